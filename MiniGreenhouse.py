@@ -46,6 +46,13 @@ References:
     - 
 '''
 
+# Import standard libraries
+import os
+import tempfile
+import logging
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
 # IMPORT LIBRARIES for DRL model 
 # Import Farama foundation's gymnasium
 import gymnasium as gym
@@ -53,34 +60,95 @@ from gymnasium.spaces import Box
 
 # Import supporting libraries
 import numpy as np
-import scipy.io as sio
-import os
 import pandas as pd
+import h5py
+
+# IMPORT LIBRARIES for DNN and LSTM models
+# TensorFlow is imported on first use by _import_tensorflow(), the runs with only the GL model do not load it
+import joblib
+from sklearn.metrics import mean_squared_error
 
 # IMPORT LIBRARIES for the matlab file
-import matlab.engine
+# matlab.engine is imported when the environment starts the MATLAB engine, importing this module does not load it
 
 # Import service functions
 from utils.ServiceFunctions import ServiceFunctions
 
-# IMPORT LIBRARIES for DNN and LSTM models
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.layers import Layer
-import joblib
-import pandas as pd
-import numpy as np
-from sklearn.metrics import mean_squared_error
+# Import the numba kernels, numba is optional (njit is a no-op decorator without it)
+from utils.NumbaFunctions import njit, convert_indoor_state
 
 # Suppress specific TensorFlow warnings
-import warnings
 warnings.filterwarnings("ignore", category=UserWarning, module="tensorflow")
 
-# Set TensorFlow logging level to ERROR
-tf.get_logger().setLevel('ERROR')
+# The per-step messages are logged at DEBUG level, they are not formatted under the default WARNING level
+logger = logging.getLogger(__name__)
+
+# Columns of the history of the GL predictions (one 2D buffer), in the order of the variables saved in drl-env.mat
+GL_VARIABLES = ['time', 'co2_in', 'temp_in', 'rh_in', 'PAR_in', 'fruit_leaf', 'fruit_stem', 
+                'fruit_dw', 'fruit_cbuf', 'fruit_tcansum', 'leaf_temp']
+(GL_TIME, GL_CO2_IN, GL_TEMP_IN, GL_RH_IN, GL_PAR_IN, GL_FRUIT_LEAF, GL_FRUIT_STEM, 
+ GL_FRUIT_DW, GL_FRUIT_CBUF, GL_FRUIT_TCANSUM, GL_LEAF_TEMP) = range(len(GL_VARIABLES))
+
+tf = None
+
+def _init_plot_worker():
+    '''
+    Select the non-interactive Agg backend in the background plot process.
+    
+    plt.show() does not open windows there, so the process never waits for them to be closed.
+    '''
+    import matplotlib
+    matplotlib.use('Agg')
+    
+    # plt.show() warns that Agg is non-interactive, the figures are only saved
+    warnings.filterwarnings("ignore", message=".*non-interactive.*", category=UserWarning)
+
+def _log_plot_exception(future):
+    '''
+    Log the exception of a plot that ran in the background process, the episode does not wait for its result.
+    '''
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Plot in the background process failed", exc_info=future.exception())
+
+def _import_tensorflow():
+    '''
+    Import TensorFlow once and keep it in the module global tf.
+    
+    Importing TensorFlow takes seconds and a few hundred MB of memory, so it is only done 
+    when the DNN or the combined (LSTM) models are used.
+    
+    Returns:
+    module: the tensorflow module
+    '''
+    global tf
+    
+    if tf is None:
+        import tensorflow
+        
+        # Set TensorFlow logging level to ERROR
+        tensorflow.get_logger().setLevel('ERROR')
+        
+        # For the tf.data.Dataset only supports Python-style environment
+        tensorflow.compat.v1.enable_eager_execution()
+        
+        tf = tensorflow
+    
+    return tf
 
-# For the tf.data.Dataset only supports Python-style environment
-tf.compat.v1.enable_eager_execution()
+@njit(cache=True)
+def _reward(delta_fruit_dw, ventilation, toplights, heater, w):
+    '''
+    Immediate reward r(k) = w_r,y1 * Δy1(k) - Σ (from i=1 to 3) w_r,ai * ai(k), see MiniGreenhouse.get_reward.
+    
+    Parameters:
+    delta_fruit_dw: float - The change in fruit dry weight Δy1(k).
+    ventilation, toplights, heater: float - The actions ai(k).
+    w: tuple - The coefficients (w_r_y1, w_r_a1, w_r_a2, w_r_a3).
+    
+    Returns:
+    float: the immediate reward
+    '''
+    return w[0] * delta_fruit_dw - ((w[1] * ventilation) + (w[2] * toplights) + (w[3] * heater))
 
 class MiniGreenhouse(gym.Env):
     '''
@@ -113,6 +181,9 @@ class MiniGreenhouse(gym.Env):
         self.flag_run_dnn = env_config.get("flag_run_dnn", False) # Default is false, flag to run the Neural Networks model
         self.flag_run_gl = env_config.get("flag_run_gl", True) # Default is true, flag to run the green light model
         self.flag_run_combined_models = env_config.get("flag_run_combined_models", True) # Default is true, flag to run the LSTM model
+        self.quantize_dnn = env_config.get("quantize_dnn", False) # Default is false, flag to run the DNN models as INT8 quantized TFLite model
+        
+        self.compress_mqtt = env_config.get("compress_mqtt", False) # Default is false, flag to publish the controls zlib compressed (the IoT system has to inflate them)
         
         is_mature = env_config.get("is_mature", False) # The crops are mature or not
         
@@ -123,11 +194,19 @@ class MiniGreenhouse(gym.Env):
         self.max_steps = env_config.get("max_steps", 3) # One episode = 3 steps = 1 hour, because 1 step = 20 minutes
     
         # Start MATLAB engine
+        import matlab.engine
         self.eng = matlab.engine.start_matlab()
+        
+        # The MATLAB array type of the arguments, kept so the conversion every step does not import it again
+        self._matlab_double = matlab.double
 
         # Path to MATLAB script
         if self.flag_run_gl == True:
             self.matlab_script_path = r'matlab\DrlGlEnvironment.m'
+            
+            # Add the folder of the MATLAB script to the MATLAB path once for the persistent engine
+            # Do not cd into it, MATLAB exchanges the .mat files in the current folder
+            self.eng.addpath(os.path.abspath(os.path.dirname(self.matlab_script_path)), nargout=0)
         
         # No matter if the flag_run_dnn True or not we still need to load the files for the offline training
         # Load the datasets from separate files for the DNN model
@@ -144,26 +223,79 @@ class MiniGreenhouse(gym.Env):
                 # file_path = r"matlab\Mini Greenhouse\june-iot-datasets-test-small-crops.xlsx"
                 file_path = r"matlab\Mini Greenhouse\august-iot-datasets-test-small-crops.xlsx"
                 
-        # Load the dataset
-        self.mgh_data = pd.read_excel(file_path)
-        
-        # Initialize lists to store control values
-        self.ventilation_list = []
-        self.toplights_list = []
-        self.heater_list = []
+        # Load the dataset, from the pickle cache of the workbook if it is up to date
+        self.mgh_data = self._read_excel_cached(file_path)
+        
+        # Column order of the step data and of the history of the measurements
+        self.excel_mqtt_columns = ['time', 'global out', 'global in', 'temp in', 'temp out', 'rh in', 'rh out', 
+                                   'co2 in', 'co2 out', 'leaf temp', 'toplights', 'ventilation', 'heater']
+        
+        # Extract the numpy array of the dataset once, it does not change during the simulation
+        self.mgh_data_np = self.mgh_data[self.excel_mqtt_columns].to_numpy(dtype=np.float64)
+        
+        # Preallocate the history of the measurements, 4 rows for the initialization and for every step
+        self._excel_mqtt_buffer = np.empty((4 * (self.max_steps + 1), len(self.excel_mqtt_columns)))
+        self._excel_mqtt_count = 0
+        
+        # Preallocate the history of the predictions from the GL model (the variables saved in drl-env.mat) 
+        self.gl_variables = GL_VARIABLES
+        # float64, the same type MATLAB uses, so the values are passed to MATLAB without conversion
+        self._gl_buffer = np.empty((4 * (self.max_steps + 1), len(self.gl_variables)), dtype=np.float64)
+        self._gl_count = 0
+        
+        # Preallocate the history of the control values (ventilation, toplights and heater), 
+        # the ventilation_list, toplights_list and heater_list are views of it
+        self._actions_buffer = np.empty((4 * (self.max_steps + 1), 3), dtype=np.float64)
+        self._actions_count = 0
                         
-        # Initialize a list to store rewards
-        self.rewards_list = []
+        # Preallocate the history of the rewards, rewards_list is a view of it
+        self._rewards_buffer = np.empty(4 * (self.max_steps + 1), dtype=np.float64)
+        self._rewards_count = 0
         
         # Initialize rewardmatlab
         reward = 0
         
         # Record the reward for the first time
-        self.rewards_list.extend([reward] * 4)
+        self._append_reward(reward)
 
         # Initialize ServiceFunctions
         self.service_functions = ServiceFunctions()
         
+        # Background process for the plots at the end of an episode, started on the first plot
+        self._plot_pool = None
+        
+        # Target variables and input features of the DNN models
+        self.dnn_target_variables = ['global in', 'temp in', 'rh in', 'co2 in', 'leaf temp']
+        self.dnn_features = ['time', 'global out', 'temp out', 'rh out', 'co2 out', 'ventilation', 'toplights', 'heater']
+        
+        # Column indices of the DNN features in the step data, computed once
+        self._dnn_feature_idx = [self.excel_mqtt_columns.index(feature) for feature in self.dnn_features]
+        
+        # Cache for the loaded DNN models and scalers, so they are only read from disk once per target variable
+        self._dnn_models = {}
+        self._dnn_scalers = {}
+        
+        # Cached mean and inverse scale (float32) of the scalers, to scale the features with plain numpy
+        self._dnn_scaler_mean = {}
+        self._dnn_scaler_inv_scale = {}
+        
+        # Preallocate the history of the predictions from the DNN model, in order of dnn_target_variables
+        self._dnn_buffer = np.empty((4 * (self.max_steps + 1), len(self.dnn_target_variables)), dtype=np.float32)
+        self._dnn_count = 0
+        
+        # Build the fused DNN model and its jitted graph once
+        if self.flag_run_dnn == True:
+            self._build_dnn_predictor()
+        
+        # Time steps in seconds of the controls for the GL model, 20 minutes (1200 seconds)
+        # The same every step, computed once
+        self._time_steps = np.linspace(300, 1200, 4).reshape(-1, 1)
+        
+        # Cache of the JSON payloads of the controls published to the IoT system, keyed by the actions
+        # Only used when running online, offline runs do not format or publish the controls
+        if self.online_measurements == True:
+            self._json_cache = {}
+        
         # Load the updated data from the excel or from mqtt 
         self.load_excel_or_mqtt_data(None)
                 
@@ -177,7 +309,7 @@ class MiniGreenhouse(gym.Env):
             if self.online_measurements == True:
 
                 # Run the script with the updated outdoor measurements for the first time
-                self.run_matlab_script('outdoor-indoor.mat', None, None)
+                self.run_matlab_script(self.outdoor_indoor_measurements, None, None)
             else:
                 # Run the script with empty parameter
                 self.run_matlab_script()
@@ -223,6 +355,175 @@ class MiniGreenhouse(gym.Env):
         SS_tot = tf.reduce_sum(tf.square(y_true - tf.reduce_mean(y_true))) 
         return (1 - SS_res/(SS_tot + tf.keras.backend.epsilon()))
     
+    def _read_excel_cached(self, file_path):
+        '''
+        Read the Excel dataset, parsing the workbook is slow so it is cached as a pickle next to it.
+        
+        The cache is written on the first read and read again as long as it is newer than the workbook.
+        It is written to a temporary file and then moved into place, so other environments that start 
+        at the same time never read a partly written cache. An unreadable cache falls back to the workbook.
+        
+        Parameters:
+        file_path: str - The path of the Excel dataset.
+        
+        Returns:
+        pd.DataFrame: the dataset
+        '''
+        cache_path = file_path + '.pkl'
+        
+        if os.path.isfile(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(file_path):
+            try:
+                return pd.read_pickle(cache_path)
+            except Exception as e:
+                # Also a cache written by another pandas or numpy version, e.g. ModuleNotFoundError for numpy._core
+                logger.warning("Cache %s can not be read (%r), reading %s again", cache_path, e, file_path)
+        
+        data = pd.read_excel(file_path)
+        
+        # Write the cache in the same directory, os.replace moves it into place in one step
+        # A read-only dataset directory raises already in mkstemp
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(suffix='.pkl.tmp', dir=os.path.dirname(os.path.abspath(cache_path)))
+            os.close(fd)
+            data.to_pickle(tmp_path)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # The cache is only an optimization, the data is already read
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        return data
+    
+    def _get_dnn_model(self, target_variable):
+        '''
+        Get the DNN model and scaler of the target variable, they are loaded from disk on the first call only.
+        
+        Parameters:
+        target_variable: str - The target variable to predict.
+        
+        Returns:
+        tuple: the loaded Keras model and the fitted scaler
+        '''
+        if target_variable not in self._dnn_models:
+            _import_tensorflow()
+            
+            # Load the model and scaler with error handling
+            # compile=False, the optimizer and metrics are not needed for the inference, 
+            # so the custom r2_score_metric is not deserialized either
+            try:
+                self._dnn_models[target_variable] = tf.keras.models.load_model(f'trained-dnn-models/{target_variable}_model.keras', compile=False)
+            except Exception as e:
+                raise ValueError(f"Failed to load the model: {e}")
+            
+            try:
+                scaler = joblib.load(f'trained-dnn-models/{target_variable}_scaler.pkl')
+            except Exception as e:
+                raise ValueError(f"Failed to load the scaler: {e}")
+            
+            self._dnn_scalers[target_variable] = scaler
+            
+            # Cache the scaling as float32 arrays, the targets with identical scalers share the same arrays
+            mean = scaler.mean_.astype(np.float32)
+            inv_scale = (1.0 / scaler.scale_).astype(np.float32)
+            for other_target_variable, other_mean in self._dnn_scaler_mean.items():
+                other_inv_scale = self._dnn_scaler_inv_scale[other_target_variable]
+                if np.array_equal(other_mean, mean) and np.array_equal(other_inv_scale, inv_scale):
+                    mean, inv_scale = other_mean, other_inv_scale
+                    break
+            
+            self._dnn_scaler_mean[target_variable] = mean
+            self._dnn_scaler_inv_scale[target_variable] = inv_scale
+        
+        return self._dnn_models[target_variable], self._dnn_scalers[target_variable]
+    
+    def _build_dnn_predictor(self):
+        '''
+        Fuse all the DNN models (in order of dnn_target_variables) into one multi-output Keras model 
+        and wrap it in one jitted graph.
+        
+        The scalers are folded into the fused model as Normalization layers, so it takes the unscaled features 
+        of the step data, shape (rows, features). The target variables with identical scalers share one 
+        Normalization layer, the features are scaled once for them (the leaf temp scaler differs from the others). 
+        The output has shape (rows, targets).
+        
+        XLA fuses the ops of the models into one kernel and the fixed input_signature prevents retracing 
+        the graph every step.
+        '''
+        _import_tensorflow()
+        
+        shared_input = tf.keras.Input(shape=(len(self.dnn_features),), dtype=tf.float32)
+        
+        normalized_inputs = [] # Pairs of (cached scaler mean, normalized input)
+        outputs = []
+        for target_variable in self.dnn_target_variables:
+            dnn_model, scaler = self._get_dnn_model(target_variable)
+            
+            # Reuse the normalized input of an identical scaler, identical scalers share the cached mean array
+            mean = self._dnn_scaler_mean[target_variable]
+            normalized_input = None
+            for other_mean, other_normalized_input in normalized_inputs:
+                if other_mean is mean:
+                    normalized_input = other_normalized_input
+                    break
+            
+            if normalized_input is None:
+                normalized_input = tf.keras.layers.Normalization(mean=scaler.mean_, variance=np.square(scaler.scale_))(shared_input)
+                normalized_inputs.append((mean, normalized_input))
+            
+            # The saved models have the same names, the names must be unique in the fused model
+            dnn_model.name = f"{target_variable.replace(' ', '_')}_model"
+            outputs.append(dnn_model(normalized_input))
+        
+        self._dnn_combined_model = tf.keras.Model(inputs=shared_input, outputs=tf.keras.layers.Concatenate()(outputs))
+        
+        @tf.function(jit_compile=True, input_signature=[tf.TensorSpec([None, len(self.dnn_features)], tf.float32)])
+        def predict_all_dnn(X_features):
+            return self._dnn_combined_model(X_features, training=False)
+        
+        self._predict_all_dnn = predict_all_dnn
+        
+        if self.quantize_dnn == True:
+            self._build_dnn_tflite_interpreter()
+    
+    def _build_dnn_tflite_interpreter(self):
+        '''
+        Convert the fused DNN model to a TFLite model with INT8 weights and load it in the TFLite interpreter.
+        
+        Dynamic range quantization is used, the activations stay float32.
+        Full INT8 quantization of the unscaled input (time in seconds next to the other features) 
+        collapses the features before the normalization layers.
+        '''
+        converter = tf.lite.TFLiteConverter.from_keras_model(self._dnn_combined_model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        tflite_model = converter.convert()
+        
+        # Load the quantized model once
+        self._dnn_interpreter = tf.lite.Interpreter(model_content=tflite_model)
+        self._dnn_interpreter.allocate_tensors()
+        self._dnn_input_index = self._dnn_interpreter.get_input_details()[0]['index']
+        self._dnn_output_index = self._dnn_interpreter.get_output_details()[0]['index']
+    
+    def _predict_all_dnn_tflite(self, X_features):
+        '''
+        Predict all the target variables with the quantized TFLite model.
+        
+        Parameters:
+        X_features: np.array - The unscaled features (float32), shape (rows, features) in order of dnn_features.
+        
+        Return: 
+        np.array: predicted measurements inside mini-greenhouse, shape (rows, targets)
+        '''
+        # Resize the input tensor only if the number of rows changed
+        if tuple(self._dnn_interpreter.get_input_details()[0]['shape']) != X_features.shape:
+            self._dnn_interpreter.resize_tensor_input(self._dnn_input_index, X_features.shape)
+            self._dnn_interpreter.allocate_tensors()
+        
+        self._dnn_interpreter.set_tensor(self._dnn_input_index, X_features)
+        self._dnn_interpreter.invoke()
+        
+        return self._dnn_interpreter.get_tensor(self._dnn_output_index).copy()
+    
     def define_spaces(self):
         '''
         Define the observation and action spaces.
@@ -261,36 +562,126 @@ class MiniGreenhouse(gym.Env):
         '''
         
         # Initialize for the first time 
-        time_steps = np.linspace(300, 1200, 4) # 20 minutes (1200 seconds)
         self.controls = {
-            'time': time_steps.reshape(-1, 1),
-            'ventilation': np.zeros(4).reshape(-1, 1),
-            'toplights': np.zeros(4).reshape(-1, 1),
-            'heater': np.zeros(4).reshape(-1, 1)
+            'time': self._time_steps,
+            'ventilation': np.zeros((4, 1)),
+            'toplights': np.zeros((4, 1)),
+            'heater': np.zeros((4, 1))
         }
         
-        # Append only the latest 3 values from each control variable 
-        self.ventilation_list.extend(self.controls['ventilation'].flatten()[-4:])
-        self.toplights_list.extend(self.controls['toplights'].flatten()[-4:])
-        self.heater_list.extend(self.controls['heater'].flatten()[-4:])
-        sio.savemat('controls.mat', self.controls)
+        # Append the 4 values from each control variable, ravel() does not copy
+        self._append_actions(self.controls['ventilation'].ravel(), self.controls['toplights'].ravel(), self.controls['heater'].ravel())
+        
+    def _to_matlab_struct(self, data):
+        '''
+        Convert a dict of numpy arrays to the engine type of a MATLAB struct (a dict of matlab.double).
+        
+        The struct is passed to the MATLAB function directly, no .mat file is written and read again.
+        
+        Parameters:
+        data: dict - The column vectors, shape (rows, 1).
         
-    def run_matlab_script(self, outdoor_file = None, indoor_file=None, fruit_file=None):
+        Returns:
+        dict: the same fields as matlab.double matrices
         '''
-        Run the MATLAB script.
+        return {field: self._matlab_double(np.asarray(values, dtype=np.float64).tolist()) for field, values in data.items()}
+    
+    def run_matlab_script(self, outdoor=None, indoor=None, fruit=None, background=False):
         '''
-        # Check if the outdoor_file or indoor_file or fruit_file is None
-        if indoor_file is None:
-            indoor_file = []
+        Run the MATLAB script with the controls of self.controls.
+        
+        Parameters:
+        outdoor, indoor, fruit: dict - The online outdoor measurements, the indoor and fruit growth state variables (optional), 
+                                       passed to MATLAB as structs.
+        background: bool - Run the script asynchronously in the MATLAB engine.
         
-        if fruit_file is None:
-            fruit_file = []
+        With background, the call returns after the arguments are converted, the simulation runs in the MATLAB 
+        process and Python keeps working until result() is called. No extra Python thread is needed for that.
         
-        if outdoor_file is None:
-            outdoor_file = []
+        Returns:
+        matlab.engine.FutureResult: if background is True, call result() to wait for the simulation, otherwise None
+        '''
+        # Empty arguments for the outdoor, indoor and fruit that are None
+        outdoor = [] if outdoor is None else self._to_matlab_struct(outdoor)
+        indoor = [] if indoor is None else self._to_matlab_struct(indoor)
+        fruit = [] if fruit is None else self._to_matlab_struct(fruit)
         
-        self.eng.DrlGlEnvironment(self.season_length_gl, self.first_day_gl, 'controls.mat', outdoor_file, indoor_file, fruit_file, self.is_mature_matlab, nargout=0)
+        return self.eng.DrlGlEnvironment(self.season_length_gl, self.first_day_gl, self._to_matlab_struct(self.controls), outdoor, indoor, fruit, 
+                                         self.is_mature_matlab, nargout=0, background=background)
 
+    def _append_rows(self, buffer, count, new_rows):
+        '''
+        Write the new rows into a preallocated history buffer.
+        
+        The buffers are sized for max_steps in the initialization. When a run keeps stepping after that 
+        (for example in the training, the history is not cleared by reset) the buffer capacity is doubled, 
+        so it is not reallocated and copied every step as with np.concatenate.
+        
+        Parameters:
+        buffer: np.array - The history buffer, the rows are the samples.
+        count: int - The number of filled rows of the buffer.
+        new_rows: np.array - The rows to be appended.
+        
+        Returns:
+        tuple: the (reallocated) buffer and the new number of filled rows
+        '''
+        new_count = count + len(new_rows)
+        
+        # Double the capacity if the new rows do not fit anymore
+        if new_count > buffer.shape[0]:
+            new_buffer = np.empty((max(new_count, 2 * buffer.shape[0]),) + buffer.shape[1:], dtype=buffer.dtype)
+            new_buffer[:count] = buffer[:count]
+            buffer = new_buffer
+        
+        buffer[count:new_count] = new_rows
+        
+        return buffer, new_count
+    
+    def _append_actions(self, ventilation, toplights, heater):
+        '''
+        Write the control values of a step into the history of the controls.
+        
+        Parameters:
+        ventilation, toplights, heater: array - The 4 values of each control variable.
+        '''
+        new_actions = np.column_stack((ventilation, toplights, heater))
+        self._actions_buffer, self._actions_count = self._append_rows(self._actions_buffer, self._actions_count, new_actions)
+        
+        # Views of the filled history, no data are copied
+        self.ventilation_list = self._actions_buffer[:self._actions_count, 0]
+        self.toplights_list = self._actions_buffer[:self._actions_count, 1]
+        self.heater_list = self._actions_buffer[:self._actions_count, 2]
+    
+    def _append_reward(self, reward):
+        '''
+        Write the reward of a step into the history of the rewards, once for each of the 4 time steps.
+        
+        Parameters:
+        reward: float - The immediate reward of the step.
+        '''
+        # broadcast_to is a view, the reward is filled into the 4 rows without a temporary list or array
+        self._rewards_buffer, self._rewards_count = self._append_rows(self._rewards_buffer, self._rewards_count, np.broadcast_to(reward, 4))
+        
+        # View of the filled history, no data are copied
+        self.rewards_list = self._rewards_buffer[:self._rewards_count]
+    
+    def _discretize_actions(self, _action_drl):
+        '''
+        Convert the actions from the DRL model to discrete values, 1 (on) if the action >= 0.5 otherwise 0 (off).
+        
+        Parameters:
+        _action_drl: array - The actions from the DRL model, in order: ventilation, toplights and heater.
+        
+        Returns:
+        tuple: ventilation, toplights and heater, each as a (read-only) array of 4 values for the 4 time steps
+        '''
+        # Keep the default integer type, the controls are concatenated with the time in MATLAB 
+        # and a small integer type (e.g. int8) would saturate the time values
+        actions = (np.asarray(_action_drl[:3]) >= 0.5).astype(int)
+        ventilation, toplights, heater = np.broadcast_to(actions[:, None], (3, 4))
+        
+        return ventilation, toplights, heater
+    
     def load_excel_or_mqtt_data(self, _action_drl):
         '''
         Load data from .xlsx file or mqtt data and store in instance variables.
@@ -299,197 +690,103 @@ class MiniGreenhouse(gym.Env):
         '''
 
         if self.online_measurements == True:
-            print("LOAD DATA FROM ONLINE MEASUREMENTS")
+            logger.debug("LOAD DATA FROM ONLINE MEASUREMENTS")
             
             # Initialize outdoor measurements, to get the outdoor measurements
             outdoor_indoor_measurements = self.service_functions.get_outdoor_indoor_measurements(broker="192.168.1.56", port=1883, topic="greenhouse-iot-system/outdoor-indoor-measurements")
             
-            # Convert outdoor_indoor_measurements to a DataFrame
-            self.step_data = pd.DataFrame({
-                'time': outdoor_indoor_measurements['time'].flatten(),
-                'global out': outdoor_indoor_measurements['par_out'].flatten(),
-                'global in': outdoor_indoor_measurements['par_in'].flatten(),
-                'temp out': outdoor_indoor_measurements['temp_out'].flatten(),
-                'temp in': outdoor_indoor_measurements['temp_in'].flatten(),
-                'rh out': outdoor_indoor_measurements['hum_out'].flatten(),
-                'rh in': outdoor_indoor_measurements['hum_in'].flatten(),
-                'co2 out': outdoor_indoor_measurements['co2_out'].flatten(),
-                'co2 in': outdoor_indoor_measurements['co2_in'].flatten(),
-                'leaf temp': outdoor_indoor_measurements['leaf_temp'].flatten()
-            })
+            # Keep the latest measurements, they are passed to the MATLAB script as the outdoor struct
+            self.outdoor_indoor_measurements = outdoor_indoor_measurements
             
-            # Add empty columns for toplights, ventilation, and heater
-            self.step_data['toplights'] = np.nan       # or None
-            self.step_data['ventilation'] = np.nan     # or None
-            self.step_data['heater'] = np.nan          # or None
-            
-            # Map the outdoor measurements to the corresponding variables
-            new_time_excel_mqtt = outdoor_indoor_measurements['time'].flatten()
-            new_global_out_excel_mqtt = outdoor_indoor_measurements['par_out'].flatten()
-            new_global_in_excel_mqtt = outdoor_indoor_measurements['par_in'].flatten()  
-            new_temp_out_excel_mqtt = outdoor_indoor_measurements['temp_out'].flatten()  
-            new_temp_in_excel_mqtt = outdoor_indoor_measurements['temp_in'].flatten()
-            new_rh_out_excel_mqtt = outdoor_indoor_measurements['hum_out'].flatten()  
-            new_rh_in_excel_mqtt = outdoor_indoor_measurements['hum_in'].flatten()
-            new_co2_out_excel_mqtt = outdoor_indoor_measurements['co2_out'].flatten()  
-            new_co2_in_excel_mqtt = outdoor_indoor_measurements['co2_in'].flatten()
-            new_leaf_temp_excel_mqtt = outdoor_indoor_measurements['leaf_temp'].flatten()
-            
-            if self.action_from_drl == True and _action_drl is not None:
-                # Use the actions from the DRL model and convert actions to discrete values
-                ventilation = 1 if _action_drl[0] >= 0.5 else 0
-                toplights = 1 if _action_drl[1] >= 0.5 else 0
-                heater = 1 if _action_drl[2] >= 0.5 else 0
-                
-                ventilation = np.full(4, ventilation)
-                toplights = np.full(4, toplights)
-                heater = np.full(4, heater)
-                
-                # Update the step_data with the DRL model's actions using .loc
-                self.step_data.loc[:, 'toplights'] = toplights
-                self.step_data.loc[:, 'ventilation'] = ventilation
-                self.step_data.loc[:, 'heater'] = heater
-                
-                # Add new data
-                new_toplights = self.step_data['toplights'].values
-                new_ventilation = self.step_data['ventilation'].values
-                new_heater = self.step_data['heater'].values
-
-            else:
-                # Handle if the _action_drl is None for the first time 
-                ventilation = np.full(4, 0)
-                toplights = np.full(4, 0)
-                heater = np.full(4, 0)
-                
-                # Update the step_data with the DRL model's actions using .loc
-                self.step_data.loc[:, 'toplights'] = toplights
-                self.step_data.loc[:, 'ventilation'] = ventilation
-                self.step_data.loc[:, 'heater'] = heater
-                
-                # Use the actions from the offline dataset and add new data
-                new_toplights = self.step_data['toplights'].values
-                new_ventilation = self.step_data['ventilation'].values
-                new_heater = self.step_data['heater'].values
-
-            # Check if instance variables already exist; if not, initialize them
-            if not hasattr(self, 'time_excel_mqtt'):
-                self.time_excel_mqtt = new_time_excel_mqtt
-                self.global_out_excel_mqtt = new_global_out_excel_mqtt
-                self.global_in_excel_mqtt = new_global_in_excel_mqtt
-                self.temp_in_excel_mqtt = new_temp_in_excel_mqtt
-                self.temp_out_excel_mqtt = new_temp_out_excel_mqtt
-                self.rh_in_excel_mqtt = new_rh_in_excel_mqtt
-                self.rh_out_excel_mqtt = new_rh_out_excel_mqtt
-                self.co2_in_excel_mqtt = new_co2_in_excel_mqtt
-                self.co2_out_excel_mqtt = new_co2_out_excel_mqtt
-                self.leaf_temp_excel_mqtt = new_leaf_temp_excel_mqtt
-                self.toplights = new_toplights
-                self.ventilation = new_ventilation
-                self.heater = new_heater
-            else:
-                # Concatenate new data with existing data
-                self.time_excel_mqtt = np.concatenate((self.time_excel_mqtt, new_time_excel_mqtt))
-                self.global_out_excel_mqtt = np.concatenate((self.global_out_excel_mqtt, new_global_out_excel_mqtt))
-                self.global_in_excel_mqtt = np.concatenate((self.global_in_excel_mqtt, new_global_in_excel_mqtt))
-                self.temp_in_excel_mqtt = np.concatenate((self.temp_in_excel_mqtt, new_temp_in_excel_mqtt))
-                self.temp_out_excel_mqtt = np.concatenate((self.temp_out_excel_mqtt, new_temp_out_excel_mqtt))
-                self.rh_in_excel_mqtt = np.concatenate((self.rh_in_excel_mqtt, new_rh_in_excel_mqtt))
-                self.rh_out_excel_mqtt = np.concatenate((self.rh_out_excel_mqtt, new_rh_out_excel_mqtt))
-                self.co2_in_excel_mqtt = np.concatenate((self.co2_in_excel_mqtt, new_co2_in_excel_mqtt))
-                self.co2_out_excel_mqtt = np.concatenate((self.co2_out_excel_mqtt, new_co2_out_excel_mqtt))
-                self.leaf_temp_excel_mqtt = np.concatenate((self.leaf_temp_excel_mqtt, new_leaf_temp_excel_mqtt))
-                self.toplights = np.concatenate((self.toplights, new_toplights))
-                self.ventilation = np.concatenate((self.ventilation, new_ventilation))
-                self.heater = np.concatenate((self.heater, new_heater))
-        
-            # Optionally: Check or print the step_data structure to ensure it's correct
-            print("Step Data (online):", self.step_data.head())
+            # Map the outdoor measurements to the columns of the step data (excel_mqtt_columns)
+            # The toplights, ventilation, and heater are zero for the first time, _action_drl is None
+            step_data_np = np.column_stack([
+                outdoor_indoor_measurements['time'].flatten(),
+                outdoor_indoor_measurements['par_out'].flatten(),
+                outdoor_indoor_measurements['par_in'].flatten(),
+                outdoor_indoor_measurements['temp_in'].flatten(),
+                outdoor_indoor_measurements['temp_out'].flatten(),
+                outdoor_indoor_measurements['hum_in'].flatten(),
+                outdoor_indoor_measurements['hum_out'].flatten(),
+                outdoor_indoor_measurements['co2_in'].flatten(),
+                outdoor_indoor_measurements['co2_out'].flatten(),
+                outdoor_indoor_measurements['leaf_temp'].flatten(),
+                np.zeros(len(outdoor_indoor_measurements['time'])),
+                np.zeros(len(outdoor_indoor_measurements['time'])),
+                np.zeros(len(outdoor_indoor_measurements['time']))
+            ]).astype(np.float64, copy=False)
         
         elif self.online_measurements == False:
             # Use offline dataset 
-            print("LOAD DATA FROM OFFLINE DATASETS")
+            logger.debug("LOAD DATA FROM OFFLINE DATASETS")
         
-            # Slice the dataframe to get the rows for the current step
-            self.step_data = self.mgh_data.iloc[self.season_length_dnn:self.season_length_dnn + 4]
-
-            # Extract the required columns and flatten them
-            new_time_excel_mqtt = self.step_data['time'].values
-            new_global_out_excel_mqtt = self.step_data['global out'].values
-            new_global_in_excel_mqtt = self.step_data['global in'].values
-            new_temp_in_excel_mqtt = self.step_data['temp in'].values
-            new_temp_out_excel_mqtt = self.step_data['temp out'].values
-            new_rh_in_excel_mqtt = self.step_data['rh in'].values
-            new_rh_out_excel_mqtt = self.step_data['rh out'].values
-            new_co2_in_excel_mqtt = self.step_data['co2 in'].values
-            new_co2_out_excel_mqtt = self.step_data['co2 out'].values
-            new_leaf_temp_excel_mqtt = self.step_data['leaf temp'].values
+            # Slice the rows for the current step from the extracted offline dataset, 
+            # copy it because the actions can be changed by the DRL model
+            step_data_np = self.mgh_data_np[self.season_length_dnn:self.season_length_dnn + 4].copy()
+        
+        if self.action_from_drl == True and _action_drl is not None:
+            # Use the actions from the DRL model
+            # Convert actions to discrete values
+            ventilation, toplights, heater = self._discretize_actions(_action_drl)
             
-            if self.action_from_drl == True and _action_drl is not None:
-                # Use the actions from the DRL model
-                # Convert actions to discrete values
-                ventilation = 1 if _action_drl[0] >= 0.5 else 0
-                toplights = 1 if _action_drl[1] >= 0.5 else 0
-                heater = 1 if _action_drl[2] >= 0.5 else 0
-                
-                ventilation = np.full(4, ventilation)
-                toplights = np.full(4, toplights)
-                heater = np.full(4, heater)
-                
-                # Update the step_data with the DRL model's actions using .loc
-                self.step_data.loc[:, 'toplights'] = toplights
-                self.step_data.loc[:, 'ventilation'] = ventilation
-                self.step_data.loc[:, 'heater'] = heater
-                
-                # Add new data
-                new_toplights = self.step_data['toplights'].values
-                new_ventilation = self.step_data['ventilation'].values
-                new_heater = self.step_data['heater'].values
-
-            else:
-                # Use the actions from the offline dataset and add new data
-                new_toplights = self.step_data['toplights'].values
-                new_ventilation = self.step_data['ventilation'].values
-                new_heater = self.step_data['heater'].values
-
-            # Check if instance variables already exist; if not, initialize them
-            if not hasattr(self, 'time_excel_mqtt'):
-                self.time_excel_mqtt = new_time_excel_mqtt
-                self.global_out_excel_mqtt = new_global_out_excel_mqtt
-                self.global_in_excel_mqtt = new_global_in_excel_mqtt
-                self.temp_in_excel_mqtt = new_temp_in_excel_mqtt
-                self.temp_out_excel_mqtt = new_temp_out_excel_mqtt
-                self.rh_in_excel_mqtt = new_rh_in_excel_mqtt
-                self.rh_out_excel_mqtt = new_rh_out_excel_mqtt
-                self.co2_in_excel_mqtt = new_co2_in_excel_mqtt
-                self.co2_out_excel_mqtt = new_co2_out_excel_mqtt
-                self.leaf_temp_excel_mqtt = new_leaf_temp_excel_mqtt
-                self.toplights = new_toplights
-                self.ventilation = new_ventilation
-                self.heater = new_heater
-            else:
-                # Concatenate new data with existing data
-                self.time_excel_mqtt = np.concatenate((self.time_excel_mqtt, new_time_excel_mqtt))
-                self.global_out_excel_mqtt = np.concatenate((self.global_out_excel_mqtt, new_global_out_excel_mqtt))
-                self.global_in_excel_mqtt = np.concatenate((self.global_in_excel_mqtt, new_global_in_excel_mqtt))
-                self.temp_in_excel_mqtt = np.concatenate((self.temp_in_excel_mqtt, new_temp_in_excel_mqtt))
-                self.temp_out_excel_mqtt = np.concatenate((self.temp_out_excel_mqtt, new_temp_out_excel_mqtt))
-                self.rh_in_excel_mqtt = np.concatenate((self.rh_in_excel_mqtt, new_rh_in_excel_mqtt))
-                self.rh_out_excel_mqtt = np.concatenate((self.rh_out_excel_mqtt, new_rh_out_excel_mqtt))
-                self.co2_in_excel_mqtt = np.concatenate((self.co2_in_excel_mqtt, new_co2_in_excel_mqtt))
-                self.co2_out_excel_mqtt = np.concatenate((self.co2_out_excel_mqtt, new_co2_out_excel_mqtt))
-                self.leaf_temp_excel_mqtt = np.concatenate((self.leaf_temp_excel_mqtt, new_leaf_temp_excel_mqtt))
-                self.toplights = np.concatenate((self.toplights, new_toplights))
-                self.ventilation = np.concatenate((self.ventilation, new_ventilation))
-                self.heater = np.concatenate((self.heater, new_heater))
-
-            # Debugging
-            print("Step Data (offline):", self.step_data.head())
+            # Update the step data with the DRL model's actions
+            step_data_np[:, 10] = toplights
+            step_data_np[:, 11] = ventilation
+            step_data_np[:, 12] = heater
+        
+        # Step data for the DNN model, in the column order of excel_mqtt_columns
+        self.step_data = step_data_np
+        
+        # Write the step data into the history buffer
+        self._excel_mqtt_buffer, self._excel_mqtt_count = self._append_rows(self._excel_mqtt_buffer, self._excel_mqtt_count, step_data_np)
+        
+        # Views of the filled history, no data are copied
+        self.time_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 0]
+        self.global_out_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 1]
+        self.global_in_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 2]
+        self.temp_in_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 3]
+        self.temp_out_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 4]
+        self.rh_in_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 5]
+        self.rh_out_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 6]
+        self.co2_in_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 7]
+        self.co2_out_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 8]
+        self.leaf_temp_excel_mqtt = self._excel_mqtt_buffer[:self._excel_mqtt_count, 9]
+        self.toplights = self._excel_mqtt_buffer[:self._excel_mqtt_count, 10]
+        self.ventilation = self._excel_mqtt_buffer[:self._excel_mqtt_count, 11]
+        self.heater = self._excel_mqtt_buffer[:self._excel_mqtt_count, 12]
+        
+        # Debugging
+        logger.debug("Step Data (%s): %s", "online" if self.online_measurements == True else "offline", self.step_data)
+    
+    def predict_inside_measurements_dnn_arr(self, target_variable, X_features_scaled):
+        '''
+        Predict the measurements or state variables inside mini-greenhouse from the scaled features (numpy only).
+        
+        Parameters:
+        target_variable: str - The target variable to predict.
+        X_features_scaled: np.array - The scaled input features, shape (rows, features) in order of dnn_features.
+        
+        Return: 
+        np.array: predicted measurements inside mini-greenhouse, shape (rows, 1)
+        '''
+        # Get the cached model
+        loaded_model = self._get_dnn_model(target_variable)[0]
+        
+        # Predict the measurements
+        # Call the model directly, model.predict() has a large per-call overhead (data adapter, callbacks) for only 4 rows
+        X_features_tensor = tf.constant(X_features_scaled, dtype=tf.float32)
+        y_hat_measurements = loaded_model(X_features_tensor, training=False).numpy()
+        
+        # Return the predicted measurements inside the mini-greenhouse
+        return y_hat_measurements
     
-    # @tf.function
     def predict_inside_measurements_dnn(self, target_variable, data_input):
         '''
         Predict the measurements or state variables inside mini-greenhouse 
         
+        Convenience entry point for a dict or a DataFrame input, it scales the features and calls 
+        predict_inside_measurements_dnn_arr. The steps use the batched predicted_inside_measurements_dnn.
+        
         Parameters:
         target_variable: str - The target variable to predict.
         data_input: dict or pd.DataFrame - The input features for the prediction.
@@ -512,35 +809,20 @@ class MiniGreenhouse(gym.Env):
         if isinstance(data_input, dict):
             data_input = pd.DataFrame(data_input)
         
-        # Need to be fixed
-        features = ['time', 'global out', 'temp out', 'rh out', 'co2 out', 'ventilation', 'toplights', 'heater']
-
         # Ensure the data_input has the required features
-        for feature in features:
+        for feature in self.dnn_features:
             if feature not in data_input.columns:
                 raise ValueError(f"Missing feature '{feature}' in the input data.")
         
-        X_features = data_input[features]
-        
-        # Load the model and scaler with error handling
-        try:
-            loaded_model = load_model(f'trained-dnn-models/{target_variable}_model.keras', custom_objects={'r2_score_metric': self.r2_score_metric})
-        except Exception as e:
-            raise ValueError(f"Failed to load the model: {e}")
-        
-        try:
-            scaler = joblib.load(f'trained-dnn-models/{target_variable}_scaler.pkl')
-        except Exception as e:
-            raise ValueError(f"Failed to load the scaler: {e}")
-                    
-        # Scale the input features
-        X_features_scaled = scaler.transform(X_features)
+        X_features = data_input[self.dnn_features].to_numpy(dtype=np.float32)
         
-        # Predict the measurements
-        y_hat_measurements = loaded_model.predict(X_features_scaled)
+        # Scale the input features with the cached mean and inverse scale of the scaler
+        # Plain numpy, scaler.transform() validates and copies the input on every call
+        self._get_dnn_model(target_variable)
+        X_features_scaled = (X_features - self._dnn_scaler_mean[target_variable]) * self._dnn_scaler_inv_scale[target_variable]
         
         # Return the predicted measurements inside the mini-greenhouse
-        return y_hat_measurements
+        return self.predict_inside_measurements_dnn_arr(target_variable, X_features_scaled)
     
     def predicted_inside_measurements_dnn(self):
         '''
@@ -548,28 +830,25 @@ class MiniGreenhouse(gym.Env):
         
         '''
     
-        # Predict the inside measurements (the state variable inside the mini-greenhouse)
-        new_par_in_predicted_dnn = self.predict_inside_measurements_dnn('global in', self.step_data)
-        new_temp_in_predicted_dnn = self.predict_inside_measurements_dnn('temp in', self.step_data)
-        new_rh_in_predicted_dnn = self.predict_inside_measurements_dnn('rh in', self.step_data)
-        new_co2_in_predicted_dnn = self.predict_inside_measurements_dnn('co2 in', self.step_data)
-        new_leaf_temp_predicted_dnn = self.predict_inside_measurements_dnn('leaf temp', self.step_data)
-    
-        # Check if instance variables already exist; if not, initialize them
-        if not hasattr(self, 'temp_in_predicted_dnn'):
-            self.par_in_predicted_dnn = new_par_in_predicted_dnn
-            self.temp_in_predicted_dnn = new_temp_in_predicted_dnn
-            self.rh_in_predicted_dnn = new_rh_in_predicted_dnn
-            self.co2_in_predicted_dnn = new_co2_in_predicted_dnn
-            self.leaf_temp_predicted_dnn = new_leaf_temp_predicted_dnn
-    
+        # Select the input features from the step data with the precomputed column indices
+        # The features are scaled inside the fused DNN model
+        X_features = self.step_data[:, self._dnn_feature_idx].astype(np.float32)
+        
+        # Predict the inside measurements (the state variable inside the mini-greenhouse) with one call of the fused DNN model
+        if self.quantize_dnn == True:
+            y_hat_measurements = self._predict_all_dnn_tflite(X_features)
         else:
-            # Concatenate new data with existing data
-            self.par_in_predicted_dnn = np.concatenate((self.par_in_predicted_dnn, new_par_in_predicted_dnn))
-            self.temp_in_predicted_dnn = np.concatenate((self.temp_in_predicted_dnn, new_temp_in_predicted_dnn))
-            self.rh_in_predicted_dnn = np.concatenate((self.rh_in_predicted_dnn, new_rh_in_predicted_dnn))
-            self.co2_in_predicted_dnn = np.concatenate((self.co2_in_predicted_dnn, new_co2_in_predicted_dnn))
-            self.leaf_temp_predicted_dnn = np.concatenate((self.leaf_temp_predicted_dnn, new_leaf_temp_predicted_dnn))
+            y_hat_measurements = self._predict_all_dnn(tf.constant(X_features)).numpy()
+        
+        # Write the predictions into the history buffer
+        self._dnn_buffer, self._dnn_count = self._append_rows(self._dnn_buffer, self._dnn_count, y_hat_measurements)
+    
+        # Views of the filled history, in order of dnn_target_variables, and keep the (rows, 1) shape of each prediction
+        self.par_in_predicted_dnn = self._dnn_buffer[:self._dnn_count, 0:1]
+        self.temp_in_predicted_dnn = self._dnn_buffer[:self._dnn_count, 1:2]
+        self.rh_in_predicted_dnn = self._dnn_buffer[:self._dnn_count, 2:3]
+        self.co2_in_predicted_dnn = self._dnn_buffer[:self._dnn_count, 3:4]
+        self.leaf_temp_predicted_dnn = self._dnn_buffer[:self._dnn_count, 4:5]
                 
     def predicted_inside_measurements_gl(self):
         '''
@@ -578,50 +857,41 @@ class MiniGreenhouse(gym.Env):
         From matlab, the structure is:
         
         % Save the extracted data to a .mat file
-        save('drl-env.mat', 'time', 'temp_in', 'rh_in', 'co2_in', 'PAR_in', 'fruit_leaf', 'fruit_stem', 'fruit_dw', 'fruit_tcansum', 'leaf_temp');
+        save('drl-env.mat', 'time', 'temp_in', 'rh_in', 'co2_in', 'PAR_in', 'fruit_leaf', 'fruit_stem', 'fruit_dw', 'fruit_cbuf', 'fruit_tcansum', 'leaf_temp', '-v7.3', '-nocompression');
+        
+        The v7.3 .mat file is an HDF5 file, only the latest 4 values of every variable are read.
+        It is saved without compression, so the datasets are read without inflating them.
+        MATLAB column vectors are stored transposed in HDF5, with shape (1, N).
+        
+        The indoor state for the next MATLAB run is converted right after the read, see convert_indoor_state.
         '''
         
         # Read the drl-env mat from the initialization 
-        # Read the 3 values and append it
+        # Read the 4 latest values and append it
         # get the prediction from the matlab results
-        data = sio.loadmat("drl-env.mat")
-        
-        new_time_gl = data['time'].flatten()[-4:]
-        new_co2_in_predicted_gl = data['co2_in'].flatten()[-4:]
-        new_temp_in_predicted_gl = data['temp_in'].flatten()[-4:]
-        new_rh_in_predicted_gl = data['rh_in'].flatten()[-4:]
-        new_par_in_predicted_gl = data['PAR_in'].flatten()[-4:]
-        new_fruit_leaf_predicted_gl = data['fruit_leaf'].flatten()[-4:]
-        new_fruit_stem_predicted_gl = data['fruit_stem'].flatten()[-4:]
-        new_fruit_dw_predicted_gl = data['fruit_dw'].flatten()[-4:]
-        new_fruit_cbuf_predicted_gl = data['fruit_cbuf'].flatten()[-4:]
-        new_fruit_tcansum_predicted_gl = data['fruit_tcansum'].flatten()[-4:]
-        new_leaf_temp_predicted_gl = data['leaf_temp'].flatten()[-4:]
+        with h5py.File("drl-env.mat", "r") as data:
+            # The latest 4 values of every variable, in order of gl_variables
+            new_predicted_gl = np.column_stack([data[variable][..., -4:].ravel() for variable in self.gl_variables])
+        
+        # Write the predictions into the history buffer
+        self._gl_buffer, self._gl_count = self._append_rows(self._gl_buffer, self._gl_count, new_predicted_gl)
 
-        if not hasattr(self, 'time_gl'):
-            self.time_gl = new_time_gl
-            self.co2_in_predicted_gl = new_co2_in_predicted_gl
-            self.temp_in_predicted_gl = new_temp_in_predicted_gl
-            self.rh_in_predicted_gl = new_rh_in_predicted_gl
-            self.par_in_predicted_gl = new_par_in_predicted_gl
-            self.fruit_leaf_predicted_gl = new_fruit_leaf_predicted_gl
-            self.fruit_stem_predicted_gl = new_fruit_stem_predicted_gl
-            self.fruit_dw_predicted_gl = new_fruit_dw_predicted_gl
-            self.fruit_cbuf_predicted_gl = new_fruit_cbuf_predicted_gl
-            self.fruit_tcansum_predicted_gl = new_fruit_tcansum_predicted_gl
-            self.leaf_temp_predicted_gl = new_leaf_temp_predicted_gl
-        else:
-            self.time_gl = np.concatenate((self.time_gl, new_time_gl))
-            self.co2_in_predicted_gl = np.concatenate((self.co2_in_predicted_gl, new_co2_in_predicted_gl))
-            self.temp_in_predicted_gl = np.concatenate((self.temp_in_predicted_gl, new_temp_in_predicted_gl))
-            self.rh_in_predicted_gl= np.concatenate((self.rh_in_predicted_gl, new_rh_in_predicted_gl))
-            self.par_in_predicted_gl = np.concatenate((self.par_in_predicted_gl, new_par_in_predicted_gl))
-            self.fruit_leaf_predicted_gl = np.concatenate((self.fruit_leaf_predicted_gl, new_fruit_leaf_predicted_gl))
-            self.fruit_stem_predicted_gl = np.concatenate((self.fruit_stem_predicted_gl, new_fruit_stem_predicted_gl))
-            self.fruit_dw_predicted_gl = np.concatenate((self.fruit_dw_predicted_gl, new_fruit_dw_predicted_gl))
-            self.fruit_cbuf_predicted_gl = np.concatenate((self.fruit_cbuf_predicted_gl, new_fruit_cbuf_predicted_gl))
-            self.fruit_tcansum_predicted_gl = np.concatenate((self.fruit_tcansum_predicted_gl, new_fruit_tcansum_predicted_gl))
-            self.leaf_temp_predicted_gl = np.concatenate((self.leaf_temp_predicted_gl, new_leaf_temp_predicted_gl))
+        # Views of the filled history, no data are copied
+        self.time_gl = self._gl_buffer[:self._gl_count, GL_TIME]
+        self.co2_in_predicted_gl = self._gl_buffer[:self._gl_count, GL_CO2_IN]
+        self.temp_in_predicted_gl = self._gl_buffer[:self._gl_count, GL_TEMP_IN]
+        self.rh_in_predicted_gl = self._gl_buffer[:self._gl_count, GL_RH_IN]
+        self.par_in_predicted_gl = self._gl_buffer[:self._gl_count, GL_PAR_IN]
+        self.fruit_leaf_predicted_gl = self._gl_buffer[:self._gl_count, GL_FRUIT_LEAF]
+        self.fruit_stem_predicted_gl = self._gl_buffer[:self._gl_count, GL_FRUIT_STEM]
+        self.fruit_dw_predicted_gl = self._gl_buffer[:self._gl_count, GL_FRUIT_DW]
+        self.fruit_cbuf_predicted_gl = self._gl_buffer[:self._gl_count, GL_FRUIT_CBUF]
+        self.fruit_tcansum_predicted_gl = self._gl_buffer[:self._gl_count, GL_FRUIT_TCANSUM]
+        self.leaf_temp_predicted_gl = self._gl_buffer[:self._gl_count, GL_LEAF_TEMP]
+        
+        # The 3 latest rows as [time, temp_in, vapor pressure, co2 density] for the next step
+        # Convert co2_in ppm to density and Relative Humidity (RH) to Pressure in Pa in one pass over the new rows
+        self._gl_indoor_state = convert_indoor_state(new_predicted_gl, GL_TIME, GL_CO2_IN, GL_TEMP_IN, GL_RH_IN)
             
     def reset(self, *, seed=None, options=None):
         '''
@@ -645,13 +915,14 @@ class MiniGreenhouse(gym.Env):
     
         if self.flag_run_combined_models == True:
                 
-            # print the predict measurements using the LSTM model
-            print("PRINT THE OBSERVATION BASED ON THE COMBINED MODELS")
-            print("self.co2_in_predicted_combined_models :", self.co2_in_predicted_combined_models[-1])
-            print("self.temp_in_predicted_combined_models : ", self.temp_in_predicted_combined_models[-1])
-            print("self.rh_in_predicted_combined_models : ", self.rh_in_predicted_combined_models[-1])
-            print("self.par_in_predicted_combined_models : ", self.par_in_predicted_combined_models[-1])
-            print("self.leaf_temp_predicted_combined_models : ", self.leaf_temp_predicted_combined_models[-1] )
+            # Log the predict measurements using the LSTM model
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("PRINT THE OBSERVATION BASED ON THE COMBINED MODELS")
+                logger.debug("self.co2_in_predicted_combined_models : %s", self.co2_in_predicted_combined_models[-1])
+                logger.debug("self.temp_in_predicted_combined_models : %s", self.temp_in_predicted_combined_models[-1])
+                logger.debug("self.rh_in_predicted_combined_models : %s", self.rh_in_predicted_combined_models[-1])
+                logger.debug("self.par_in_predicted_combined_models : %s", self.par_in_predicted_combined_models[-1])
+                logger.debug("self.leaf_temp_predicted_combined_models : %s", self.leaf_temp_predicted_combined_models[-1])
             
             #in order: co2_in, temp_in, rh_in, PAR_in, fruit_dw, fruit_tcansum and leaf_temp
             return np.array([
@@ -707,7 +978,7 @@ class MiniGreenhouse(gym.Env):
         
         # Initialize variables, based on the equation above
         # Need to be determined to make the r_k unitless
-        w_r_y1 = 1          # Fruit dry weight 
+        w_r_y1 = 1.0        # Fruit dry weight 
         w_r_a1 = 0.005      # Ventilation
         w_r_a2 = 0.010      # Toplights
         w_r_a3 = 0.001      # Heater
@@ -721,10 +992,10 @@ class MiniGreenhouse(gym.Env):
         # cFruit or dry weight of fruit is the carbohydrates in fruit, so it is the best variable to count for the reward
         # Calculate the change in fruit dry weight
         delta_fruit_dw = (self.fruit_dw_predicted_gl[-1] - self.fruit_dw_predicted_gl[-2])
-        print("delta_fruit_dw: ", delta_fruit_dw)
+        logger.debug("delta_fruit_dw: %s", delta_fruit_dw)
         
-        r_k = w_r_y1 * delta_fruit_dw - ((w_r_a1 * _ventilation) + (w_r_a2 * _toplights) + (w_r_a3 * _heater))
-        print("r_k immediate reward: ", r_k)
+        r_k = _reward(delta_fruit_dw, _ventilation, _toplights, _heater, (w_r_y1, w_r_a1, w_r_a2, w_r_a3))
+        logger.debug("r_k immediate reward: %s", r_k)
         
         return r_k
         
@@ -732,13 +1003,7 @@ class MiniGreenhouse(gym.Env):
         '''
         delete matlab files after simulation to make it clear.    
         '''
-        os.remove('controls.mat') # controls file
         os.remove('drl-env.mat')  # simulation file
-        os.remove('indoor.mat')   # indoor measurements
-        os.remove('fruit.mat')    # fruit growth
-
-        if self.online_measurements == True:
-            os.remove('outdoor-indoor.mat')  # outdoor measurements
         
     def done(self):
         '''
@@ -793,71 +1058,58 @@ class MiniGreenhouse(gym.Env):
         # Increment the current step
         self.current_step += 1
 
-        print("\n\n----------------------------------------------------------------------------------------")
-        print("CURRENT STEPS: ", self.current_step)
-        print("----------------------------------------------------------------------------------------")
+        logger.debug("CURRENT STEPS: %d", self.current_step)
         
         if self.online_measurements == False:
             # Get the oudoor measurements
             self.load_excel_or_mqtt_data(_action_drl)
         
             # Get the actions from the excel or drl from the load_excel_or_mqtt_data, for online or offline datasets
-            time_steps = np.linspace(300, 1200, 4)  # Time steps in seconds
             ventilation = self.ventilation[-4:]
             toplights = self.toplights[-4:]
             heater = self.heater[-4:]
                                     
             # Keep only the latest 3 data points before appending
-            # Append controls to the lists
-            self.ventilation_list.extend(ventilation[-4:])
-            self.toplights_list.extend(toplights[-4:])
-            self.heater_list.extend(heater[-4:])
+            # Append controls to the history
+            self._append_actions(ventilation, toplights, heater)
             
             # Get the action from the offline datasets           
-            print("ACTION SIGNAL u(t)")
-            print("ventilation: ", ventilation)
-            print("toplights: ", toplights)
-            print("heater: ", heater)
+            logger.debug("ACTION SIGNAL u(t) ventilation: %s, toplights: %s, heater: %s", ventilation, toplights, heater)
         
         # Only publish MQTT data for the Raspberry Pi when running not training
+        # Offline datasets and training skip the JSON formatting and the publish completely
         if self.online_measurements == True:
             # Get the action from the DRL model 
             # print("RAW ACTION: ", _action_drl)
                         
             # Convert actions to discrete values
-            ventilation = 1 if _action_drl[0] >= 0.5 else 0
-            toplights = 1 if _action_drl[1] >= 0.5 else 0
-            heater = 1 if _action_drl[2] >= 0.5 else 0
+            ventilation, toplights, heater = self._discretize_actions(_action_drl)
             
-            print("ACTION SIGNAL u(t)")
-            print("ventilation: ", ventilation)
-            print("toplights: ", toplights)
-            print("heater: ", heater)
-            
-            time_steps = np.linspace(300, 1200, 4)  # Time steps in seconds
-            ventilation = np.full(4, ventilation)
-            toplights = np.full(4, toplights)
-            heater = np.full(4, heater)
+            logger.debug("ACTION SIGNAL u(t) ventilation: %s, toplights: %s, heater: %s", ventilation[0], toplights[0], heater[0])
             
             # Format data controls in JSON format
-            json_data = self.service_functions.format_data_in_JSON(time_steps, \
-                                                ventilation, toplights, \
-                                                heater)
+            # The time steps are the same every step, so the JSON only changes with the actions (8 combinations)
+            json_key = (ventilation.tobytes(), toplights.tobytes(), heater.tobytes())
+            json_data = self._json_cache.get(json_key)
+            if json_data is None:
+                json_data = self.service_functions.format_data_in_JSON(self._time_steps.ravel(), \
+                                                    ventilation, toplights, \
+                                                    heater)
+                self._json_cache[json_key] = json_data
             
             # Publish controls to the raspberry pi (IoT system client)
-            self.service_functions.publish_mqtt_data(json_data, broker="192.168.1.56", port=1883, topic="greenhouse-iot-system/drl-controls")
+            self.service_functions.publish_mqtt_data(json_data, broker="192.168.1.56", port=1883, topic="greenhouse-iot-system/drl-controls", 
+                                                     compress=self.compress_mqtt)
         
         # Create control dictionary
-        controls = {
-            'time': time_steps.reshape(-1, 1),
-            'ventilation': ventilation.reshape(-1, 1),
-            'toplights': toplights.reshape(-1, 1),
-            'heater': heater.reshape(-1, 1)
+        # [:, None] gives (4, 1) views of the actions
+        self.controls = {
+            'time': self._time_steps,
+            'ventilation': ventilation[:, None],
+            'toplights': toplights[:, None],
+            'heater': heater[:, None]
         }
         
-        # Save control variables to .mat file
-        sio.savemat('controls.mat', controls)
-        
         # Update the season_length and first_day for the GL model
         # 1 / 72 is 20 minutes in 24 hours, the calculation look like this
         # 1 / 72 * 24 [hours] * 60 [minutes . hours ^ -1] = 20 minutes 
@@ -867,42 +1119,37 @@ class MiniGreenhouse(gym.Env):
         # Update the season_length for the DNN model
         self.season_length_dnn += 4
 
+        # View of the 4 latest rows of the GL history, one contiguous block, in order of GL_VARIABLES
+        # The state variables for MATLAB are sliced from this one view with positive indices
+        gl_tail = self._gl_buffer[self._gl_count - 4:self._gl_count]
+
         if self.flag_run_gl == True:
             
             # print("USE INDOOR GREENLIGHT")
-            # Use the data from the GreenLight model
-            # Convert co2_in ppm using service functions
-            co2_density_gl = self.service_functions.co2ppm_to_dens(self.temp_in_predicted_gl[-4:], self.co2_in_predicted_gl[-4:])
-            
-            # Convert Relative Humidity (RH) to Pressure in Pa
-            vapor_density_gl = self.service_functions.rh_to_vapor_density(self.temp_in_predicted_gl[-4:], self.rh_in_predicted_gl[-4:])
-            vapor_pressure_gl = self.service_functions.vapor_density_to_pressure(self.temp_in_predicted_gl[-4:], vapor_density_gl)
+            # Use the data from the GreenLight model, already converted when it was loaded
+            indoor_state = self._gl_indoor_state
 
             # Update the MATLAB environment with the 3 latest current state
             # It will be used to be simulated in the GreenLight model with mini-greenhouse parameters
             drl_indoor = {
-                'time': self.time_gl[-3:].astype(float).reshape(-1, 1),
-                'temp_in': self.temp_in_predicted_gl[-3:].astype(float).reshape(-1, 1),
-                'rh_in': vapor_pressure_gl[-3:].astype(float).reshape(-1, 1),
-                'co2_in': co2_density_gl[-3:].astype(float).reshape(-1, 1)
+                'time': indoor_state[:, 0:1],
+                'temp_in': indoor_state[:, 1:2],
+                'rh_in': indoor_state[:, 2:3],
+                'co2_in': indoor_state[:, 3:4]
             }
-        
-            # Save control variables to .mat file
-            sio.savemat('indoor.mat', drl_indoor)
+        else:
+            drl_indoor = None
             
         # Update the fruit growth with the 1 latest current state from the GreenLight model - mini-greenhouse parameters
         fruit_growth = {
-            'time': self.time_gl[-1:].astype(float).reshape(-1, 1),
-            'fruit_leaf': self.fruit_leaf_predicted_gl[-1:].astype(float).reshape(-1, 1),
-            'fruit_stem': self.fruit_stem_predicted_gl[-1:].astype(float).reshape(-1, 1),
-            'fruit_dw': self.fruit_dw_predicted_gl[-1:].astype(float).reshape(-1, 1),
-            'fruit_cbuf': self.fruit_cbuf_predicted_gl[-1:].astype(float).reshape(-1, 1),
-            'fruit_tcansum': self.fruit_tcansum_predicted_gl[-1:].astype(float).reshape(-1, 1),
-            'leaf_temp': self.leaf_temp_predicted_gl[-1:].astype(float).reshape(-1,1)
+            'time': gl_tail[3:, GL_TIME:GL_TIME + 1],
+            'fruit_leaf': gl_tail[3:, GL_FRUIT_LEAF:GL_FRUIT_LEAF + 1],
+            'fruit_stem': gl_tail[3:, GL_FRUIT_STEM:GL_FRUIT_STEM + 1],
+            'fruit_dw': gl_tail[3:, GL_FRUIT_DW:GL_FRUIT_DW + 1],
+            'fruit_cbuf': gl_tail[3:, GL_FRUIT_CBUF:GL_FRUIT_CBUF + 1],
+            'fruit_tcansum': gl_tail[3:, GL_FRUIT_TCANSUM:GL_FRUIT_TCANSUM + 1],
+            'leaf_temp': gl_tail[3:, GL_LEAF_TEMP:GL_LEAF_TEMP + 1]
         }
-
-        # Save the fruit growth to .mat file
-        sio.savemat('fruit.mat', fruit_growth)
         
         if self.online_measurements == True:
             # Load the updated data from the excel or from mqtt, for online or offline datasets, 
@@ -911,35 +1158,38 @@ class MiniGreenhouse(gym.Env):
             self.load_excel_or_mqtt_data(_action_drl)
             
             # Get the actions from the excel or drl from the load_excel_or_mqtt_data, for online or offline datasets
-            time_steps = np.linspace(300, 1200, 4)  # Time steps in seconds
             ventilation = self.ventilation[-4:]
             toplights = self.toplights[-4:]
             heater = self.heater[-4:]
                                     
             # Keep only the latest 3 data points before appending
-            # Append controls to the lists
-            self.ventilation_list.extend(ventilation[-4:])
-            self.toplights_list.extend(toplights[-4:])
-            self.heater_list.extend(heater[-4:])
+            # Append controls to the history
+            self._append_actions(ventilation, toplights, heater)
         
-        # Run the script with the updated state variables
+        # Run the script with the updated state variables in the background
+        # The DNN model only needs the step data, so it predicts while MATLAB simulates
         if self.online_measurements == True:
-            self.run_matlab_script('outdoor-indoor.mat', 'indoor.mat', 'fruit.mat')
+            matlab_future = self.run_matlab_script(self.outdoor_indoor_measurements, drl_indoor, fruit_growth, background=True)
         else:
-            self.run_matlab_script(None, 'indoor.mat', 'fruit.mat')
-        
-        if self.flag_run_gl == True:
-            # Load the updated data from predcited from the greenlight model
-            self.predicted_inside_measurements_gl()
+            matlab_future = self.run_matlab_script(None, drl_indoor, fruit_growth, background=True)
         
         if self.flag_run_dnn == True:
             # Call the predicted inside measurements with the DNN model
             self.predicted_inside_measurements_dnn()
         
+        # The time steps do not depend on the GL results, format them while MATLAB is still running
         time_steps_formatted = list(range(0, int(self.season_length_dnn - self.first_day_dnn)))
         
         self.format_time_steps(time_steps_formatted)
         
+        # Wait for the GreenLight simulation, drl-env.mat is written when it finishes
+        # The combined models, the reward and the observation need the GL predictions, so they run after it
+        matlab_future.result()
+        
+        if self.flag_run_gl == True:
+            # Load the updated data from predcited from the greenlight model
+            self.predicted_inside_measurements_gl()
+        
         if self.flag_run_combined_models == True:
             # Combine the predicted results from the GL and DNN models
             self.predicted_combined_models(time_steps_formatted)
@@ -949,7 +1199,7 @@ class MiniGreenhouse(gym.Env):
         _reward = self.get_reward(ventilation[0], toplights[0], heater[0])
         
         # Record the reward
-        self.rewards_list.extend([_reward] * 4)
+        self._append_reward(_reward)
 
         # Truncated flag
         truncated = False
@@ -958,6 +1208,8 @@ class MiniGreenhouse(gym.Env):
         if self.flag_run == True and self.online_measurements == True:
             self.print_and_save_all_data_per_step('output/output_online_per_step.xlsx')
     
+        # The observation is a new array every step, RLlib keeps the returned observations in its sample batches
+        # The info dict stays a new dict every step, wrappers (e.g. RecordEpisodeStatistics) write their keys into it
         return self.observation(), _reward, self.done(), truncated, {}
     
     def print_and_save_all_data(self, file_name):
@@ -988,37 +1240,45 @@ class MiniGreenhouse(gym.Env):
         - par_in_predicted_gl: List of predicted PAR values from Generalized Linear Model
         '''
         
-        print("\n\n-------------------------------------------------------------------------------------")
-        print("PRINT ALL THE APPENDED DATA")
-        print("-------------------------------------------------------------------------------------")
-        print(f"Length of Time: {len(self.time_excel_mqtt)}")
-        print(f"Length of Action Ventilation: {len(self.ventilation_list)}")
-        print(f"Length of Action Toplights: {len(self.toplights_list)}")
-        print(f"Length of Action Heater: {len(self.heater_list)}")
-        print(f"Length of reward: {len(self.rewards_list)}")
-        print(f"Length of CO2 In (Actual): {len(self.co2_in_excel_mqtt)}")
-        print(f"Length of Temperature In (Actual): {len(self.temp_in_excel_mqtt)}")
-        print(f"Length of RH In (Actual): {len(self.rh_in_excel_mqtt)}")
-        print(f"Length of PAR In (Actual): {len(self.global_in_excel_mqtt)}")
-        print(f"Length of Predicted CO2 In (DNN): {len(self.co2_in_predicted_dnn)}")
-        print(f"Length of Predicted Temperature In (DNN): {len(self.temp_in_predicted_dnn)}")
-        print(f"Length of Predicted RH In (DNN): {len(self.rh_in_predicted_dnn)}")
-        print(f"Length of Predicted PAR In (DNN): {len(self.par_in_predicted_dnn)}")
-        print(f"Length of Predicted CO2 In (GL): {len(self.co2_in_predicted_gl)}")
-        print(f"Length of Predicted Temperature In (GL): {len(self.temp_in_predicted_gl)}")
-        print(f"Length of Predicted RH In (GL): {len(self.rh_in_predicted_gl)}")
-        print(f"Length of Predicted PAR In (GL): {len(self.par_in_predicted_gl)}")
+        # Collect the lines and log them as one message, one write instead of a print per line
+        summary = [
+            "-------------------------------------------------------------------------------------",
+            "PRINT ALL THE APPENDED DATA",
+            "-------------------------------------------------------------------------------------",
+            f"Length of Time: {len(self.time_excel_mqtt)}",
+            f"Length of Action Ventilation: {len(self.ventilation_list)}",
+            f"Length of Action Toplights: {len(self.toplights_list)}",
+            f"Length of Action Heater: {len(self.heater_list)}",
+            f"Length of reward: {len(self.rewards_list)}",
+            f"Length of CO2 In (Actual): {len(self.co2_in_excel_mqtt)}",
+            f"Length of Temperature In (Actual): {len(self.temp_in_excel_mqtt)}",
+            f"Length of RH In (Actual): {len(self.rh_in_excel_mqtt)}",
+            f"Length of PAR In (Actual): {len(self.global_in_excel_mqtt)}",
+            f"Length of Predicted CO2 In (DNN): {len(self.co2_in_predicted_dnn)}",
+            f"Length of Predicted Temperature In (DNN): {len(self.temp_in_predicted_dnn)}",
+            f"Length of Predicted RH In (DNN): {len(self.rh_in_predicted_dnn)}",
+            f"Length of Predicted PAR In (DNN): {len(self.par_in_predicted_dnn)}",
+            f"Length of Predicted CO2 In (GL): {len(self.co2_in_predicted_gl)}",
+            f"Length of Predicted Temperature In (GL): {len(self.temp_in_predicted_gl)}",
+            f"Length of Predicted RH In (GL): {len(self.rh_in_predicted_gl)}",
+            f"Length of Predicted PAR In (GL): {len(self.par_in_predicted_gl)}"
+        ]
+        
+        if self.flag_run_combined_models == True:
+            summary += [
+                f"Length of Predicted CO2 In (LSTM-Combined-models): {len(self.co2_in_predicted_combined_models)}",
+                f"Length of Predicted Temperature In (LSTM-Combined-models): {len(self.temp_in_predicted_combined_models)}",
+                f"Length of Predicted RH In (LSTM-Combined-models): {len(self.rh_in_predicted_combined_models)}",
+                f"Length of Predicted PAR In (LSTM-Combined-models): {len(self.par_in_predicted_combined_models)}"
+            ]
+        
+        logger.info("\n".join(summary))
         
         # RUN WITH COMBINED MODELS!
         if self.flag_run_combined_models == True:
-            print(f"Length of Predicted CO2 In (LSTM-Combined-models): {len(self.co2_in_predicted_combined_models)}")
-            print(f"Length of Predicted Temperature In (LSTM-Combined-models): {len(self.temp_in_predicted_combined_models)}")
-            print(f"Length of Predicted RH In (LSTM-Combined-models): {len(self.rh_in_predicted_combined_models)}")
-            print(f"Length of Predicted PAR In (LSTM-Combined-models): {len(self.par_in_predicted_combined_models)}")
             
             if self.action_from_drl == True and self.online_measurements == False:
-                print("---------------------------------------------------------------")
-                print("COMBINED MODELS | ACTION: DRL ON | OFFLINE")
+                logger.info("---------------------------------------------------------------\nCOMBINED MODELS | ACTION: DRL ON | OFFLINE")
                 
                 # Save all the data (included the actions) in an Excel file                
                 self.service_functions.export_to_excel(
@@ -1033,7 +1293,7 @@ class MiniGreenhouse(gym.Env):
                 self.service_functions.export_rewards_to_excel('output/rewards_list.xlsx', self.time_combined_models, self.rewards_list)
                 
                 # Plot the data
-                self.service_functions.plot_all_data(
+                self._plot_in_background(ServiceFunctions.plot_all_data,
                     'output/output_all_data.png', self.time_combined_models, 
                     None, None, None, None, 
                     self.co2_in_predicted_dnn[:, 0], self.temp_in_predicted_dnn[:, 0], self.rh_in_predicted_dnn[:, 0], self.par_in_predicted_dnn[:, 0], 
@@ -1042,12 +1302,11 @@ class MiniGreenhouse(gym.Env):
                     None, None, None)
                 
                 # Plot the actions
-                self.service_functions.plot_actions('output/output_actions.png', self.time_combined_models, self.ventilation_list, self.toplights_list, 
+                self._plot_in_background(ServiceFunctions.plot_actions, 'output/output_actions.png', self.time_combined_models, self.ventilation_list, self.toplights_list, 
                                                             self.heater_list)
                         
             else:
-                print("\n\n------------------------------------------------------------------------------------")
-                print("COMBINED MODELS | ACTION: SCHEDULED OR DRL | OFFLINE OR ONLINE")
+                logger.info("------------------------------------------------------------------------------------\nCOMBINED MODELS | ACTION: SCHEDULED OR DRL | OFFLINE OR ONLINE")
                 
                 # Evaluate predictions to get R² and MAE metrics
                 metrics_dnn, metrics_gl, metrics_combined = self.evaluate_predictions()
@@ -1068,7 +1327,7 @@ class MiniGreenhouse(gym.Env):
                 self.service_functions.export_rewards_to_excel('output/rewards_list.xlsx', self.time_combined_models, self.rewards_list)
                 
                 # Plot the leaf temperature
-                self.service_functions.plot_leaf_temperature('output/output_leaf_data.png', 
+                self._plot_in_background(ServiceFunctions.plot_leaf_temperature, 'output/output_leaf_data.png', 
                                                              self.time_combined_models, 
                                                              self.leaf_temp_excel_mqtt,
                                                              self.leaf_temp_predicted_dnn,
@@ -1076,7 +1335,7 @@ class MiniGreenhouse(gym.Env):
                                                              self.leaf_temp_predicted_combined_models) 
             
                 # Plot the data
-                self.service_functions.plot_all_data(
+                self._plot_in_background(ServiceFunctions.plot_all_data,
                     'output/output_all_data.png', self.time_combined_models, 
                     self.co2_in_excel_mqtt, self.temp_in_excel_mqtt, self.rh_in_excel_mqtt, self.global_in_excel_mqtt,
                     self.co2_in_predicted_dnn[:, 0], self.temp_in_predicted_dnn[:, 0], self.rh_in_predicted_dnn[:, 0], self.par_in_predicted_dnn[:, 0], 
@@ -1085,7 +1344,7 @@ class MiniGreenhouse(gym.Env):
                     metrics_dnn, metrics_gl, metrics_combined)
                 
                 # Plot the actions
-                self.service_functions.plot_actions('output/output_actions.png', self.time_combined_models, self.ventilation_list, self.toplights_list, 
+                self._plot_in_background(ServiceFunctions.plot_actions, 'output/output_actions.png', self.time_combined_models, self.ventilation_list, self.toplights_list, 
                                                             self.heater_list)
                 
                 # Plot the rewards
@@ -1096,8 +1355,7 @@ class MiniGreenhouse(gym.Env):
             
             # Run with dynamics control from the DRL action
             if self.action_from_drl == True and self.online_measurements == False:
-                print("---------------------------------------------------------------")
-                print("NOT COMBINED MODELS | ACTION: DRL | OFFLINE")
+                logger.info("---------------------------------------------------------------\nNOT COMBINED MODELS | ACTION: DRL | OFFLINE")
                 
                 # Save all the data (included the actions) in an Excel file
                 self.service_functions.export_to_excel(
@@ -1112,22 +1370,21 @@ class MiniGreenhouse(gym.Env):
                 self.service_functions.export_rewards_to_excel('output/rewards_list.xlsx', self.time_combined_models, self.rewards_list)
                 
                 # Plot the data
-                self.service_functions.plot_all_data(
+                self._plot_in_background(ServiceFunctions.plot_all_data,
                     'output/output_all_data.png', self.time_combined_models, 
-                    None, None, None, None, None, 
-                    self.co2_in_predicted_dnn[:, 0], self.temp_in_predicted_dnn[:, 0], self.rh_in_predicted_dnn[:, 0], self.par_in_predicted_dnn[:, 0], self.leaf_temp_predicted_dnn[:, 0],
-                    self.co2_in_predicted_gl, self.temp_in_predicted_gl, self.rh_in_predicted_gl, self.par_in_predicted_gl, self.leaf_temp_predicted_gl,
-                    None, None, None, None, None,
+                    None, None, None, None, 
+                    self.co2_in_predicted_dnn[:, 0], self.temp_in_predicted_dnn[:, 0], self.rh_in_predicted_dnn[:, 0], self.par_in_predicted_dnn[:, 0], 
+                    self.co2_in_predicted_gl, self.temp_in_predicted_gl, self.rh_in_predicted_gl, self.par_in_predicted_gl, 
+                    None, None, None, None, 
                     None, None, None)
                 
                 # Plot the actions
-                self.service_functions.plot_actions('output/output_actions.png', self.time_combined_models, self.ventilation_list, self.toplights_list, 
+                self._plot_in_background(ServiceFunctions.plot_actions, 'output/output_actions.png', self.time_combined_models, self.ventilation_list, self.toplights_list, 
                                                             self.heater_list)
             
             # Run with scheduled actions
             else:
-                print("-------------------------------------------------------------------")
-                print("NOT COMBINED MODELS | ACTION: SCHEDULED OR DRL | OFFLINE OR ONLINE")
+                logger.info("-------------------------------------------------------------------\nNOT COMBINED MODELS | ACTION: SCHEDULED OR DRL | OFFLINE OR ONLINE")
                 
                 # Save all the data in an Excel file                
                 self.service_functions.export_to_excel(
@@ -1142,7 +1399,7 @@ class MiniGreenhouse(gym.Env):
                 self.service_functions.export_rewards_to_excel('output/rewards_list.xlsx', self.time_combined_models, self.rewards_list)
                 
                 # Plot the data
-                self.service_functions.plot_all_data(
+                self._plot_in_background(ServiceFunctions.plot_all_data,
                     'output/output_all_data.png', self.time_combined_models, 
                     self.co2_in_excel_mqtt, self.temp_in_excel_mqtt, self.rh_in_excel_mqtt, self.global_in_excel_mqtt, 
                     self.co2_in_predicted_dnn[:, 0], self.temp_in_predicted_dnn[:, 0], self.rh_in_predicted_dnn[:, 0], self.par_in_predicted_dnn[:, 0], 
@@ -1150,86 +1407,77 @@ class MiniGreenhouse(gym.Env):
                     None, None, None, None, 
                     None, None, None)
                 
-                self.service_functions.plot_leaf_temperature(
+                self._plot_in_background(ServiceFunctions.plot_leaf_temperature,
                     'output/output_leaf_data.png', self.time_combined_models,
                     self.leaf_temp_excel_mqtt, self.leaf_temp_predicted_dnn, self.leaf_temp_predicted_gl, None
                 )
                 
                 # Plot the actions
-                self.service_functions.plot_actions('output/output_actions.png', self.time_combined_models, self.ventilation_list, self.toplights_list, 
+                self._plot_in_background(ServiceFunctions.plot_actions, 'output/output_actions.png', self.time_combined_models, self.ventilation_list, self.toplights_list, 
                                                             self.heater_list)
                 
+    def _plot_in_background(self, plot_function, *args):
+        '''
+        Run a plot function of ServiceFunctions in the background process.
+        
+        The rendering and saving of the figures takes seconds, the episode ends without waiting for it.
+        Only the arrays are sent to the process, the plot functions are static methods.
+        The process uses the Agg backend, the figures are saved to files and not shown.
+        
+        Parameters:
+        plot_function: The plot function of ServiceFunctions.
+        args: The arguments of the plot function.
+        
+        Returns:
+        Future: The future of the plot, an exception in the plot is logged when it finishes.
+        '''
+        
+        if self._plot_pool is None:
+            self._plot_pool = ProcessPoolExecutor(max_workers=1, initializer=_init_plot_worker)
+        
+        future = self._plot_pool.submit(plot_function, *args)
+        future.add_done_callback(_log_plot_exception)
+        
+        return future
+    
     def evaluate_predictions(self):
         '''
         Evaluate the RMSE, RRMSE, and ME of the predicted vs actual values for `par_in`, `temp_in`, `rh_in`, `co2_in`, and `leaf_temp`.
         '''
         
-        # Extract actual values
-        y_true_par_in = self.global_in_excel_mqtt
-        y_true_temp_in = self.temp_in_excel_mqtt
-        y_true_rh_in = self.rh_in_excel_mqtt
-        y_true_co2_in = self.co2_in_excel_mqtt
-        y_true_leaf_temp = self.leaf_temp_excel_mqtt
-
-        # Extract predicted values from Neural Network (DNN)
-        y_pred_par_in_dnn = self.par_in_predicted_dnn[:, 0]
-        y_pred_temp_in_dnn = self.temp_in_predicted_dnn[:, 0]
-        y_pred_rh_in_dnn = self.rh_in_predicted_dnn[:, 0]
-        y_pred_co2_in_dnn = self.co2_in_predicted_dnn[:, 0]
-        y_pred_leaf_temp_dnn = self.leaf_temp_predicted_dnn[:, 0]
-
-        # Extract predicted values from Generalized Linear Model (GL)
-        y_pred_par_in_gl = self.par_in_predicted_gl
-        y_pred_temp_in_gl = self.temp_in_predicted_gl
-        y_pred_rh_in_gl = self.rh_in_predicted_gl
-        y_pred_co2_in_gl = self.co2_in_predicted_gl
-        y_pred_leaf_temp_gl = self.leaf_temp_predicted_gl
-
-        # Extract combined model predictions
-        y_pred_par_in_combined = self.par_in_predicted_combined_models
-        y_pred_temp_in_combined = self.temp_in_predicted_combined_models
-        y_pred_rh_in_combined = self.rh_in_predicted_combined_models
-        y_pred_co2_in_combined = self.co2_in_predicted_combined_models
-        y_pred_leaf_temp_combined = self.leaf_temp_predicted_combined_models
-
-        # Calculate RMSE, RRMSE, and ME for each variable
+        variables = ['PAR', 'Temperature', 'Humidity', 'CO2', 'Leaf Temperature']
+        
+        # Stack the actual values and the predictions as (rows, variables), in order of variables
+        y_true = np.column_stack([self.global_in_excel_mqtt, self.temp_in_excel_mqtt, self.rh_in_excel_mqtt, 
+                                  self.co2_in_excel_mqtt, self.leaf_temp_excel_mqtt])
+        
+        # Predicted values from Neural Network (DNN), the DNN history buffer is in order of dnn_target_variables
+        y_pred_dnn = self._dnn_buffer[:self._dnn_count]
+        
+        # Predicted values from the GreenLight model (GL)
+        y_pred_gl = np.column_stack([self.par_in_predicted_gl, self.temp_in_predicted_gl, self.rh_in_predicted_gl, 
+                                     self.co2_in_predicted_gl, self.leaf_temp_predicted_gl])
+        
+        # Combined model predictions
+        y_pred_combined = np.column_stack([self.par_in_predicted_combined_models, self.temp_in_predicted_combined_models, self.rh_in_predicted_combined_models, 
+                                           self.co2_in_predicted_combined_models, self.leaf_temp_predicted_combined_models])
+        
+        # Calculate RMSE, RRMSE, and ME of all the variables at once
         def calculate_metrics(y_true, y_pred):
-            rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-            rrmse = rmse / np.mean(y_true) * 100  # Remember that it is in percentage
-            me = np.mean(y_pred - y_true)
-            return rmse, rrmse, me
-
-        # DNN model metrics
-        metrics_dnn = {
-            'PAR': calculate_metrics(y_true_par_in, y_pred_par_in_dnn),
-            'Temperature': calculate_metrics(y_true_temp_in, y_pred_temp_in_dnn),
-            'Humidity': calculate_metrics(y_true_rh_in, y_pred_rh_in_dnn),
-            'CO2': calculate_metrics(y_true_co2_in, y_pred_co2_in_dnn),
-            'Leaf Temperature': calculate_metrics(y_true_leaf_temp, y_pred_leaf_temp_dnn)
-        }
-
-        # GL model metrics
-        metrics_gl = {
-            'PAR': calculate_metrics(y_true_par_in, y_pred_par_in_gl),
-            'Temperature': calculate_metrics(y_true_temp_in, y_pred_temp_in_gl),
-            'Humidity': calculate_metrics(y_true_rh_in, y_pred_rh_in_gl),
-            'CO2': calculate_metrics(y_true_co2_in, y_pred_co2_in_gl),
-            'Leaf Temperature': calculate_metrics(y_true_leaf_temp, y_pred_leaf_temp_gl)
-        }
-
-        # Combined model metrics
-        metrics_combined = {
-            'PAR': calculate_metrics(y_true_par_in, y_pred_par_in_combined),
-            'Temperature': calculate_metrics(y_true_temp_in, y_pred_temp_in_combined),
-            'Humidity': calculate_metrics(y_true_rh_in, y_pred_rh_in_combined),
-            'CO2': calculate_metrics(y_true_co2_in, y_pred_co2_in_combined),
-            'Leaf Temperature': calculate_metrics(y_true_leaf_temp, y_pred_leaf_temp_combined)
-        }
+            rmse = np.sqrt(mean_squared_error(y_true, y_pred, multioutput='raw_values'))
+            rrmse = rmse / np.mean(y_true, axis=0) * 100  # Remember that it is in percentage
+            me = np.mean(y_pred - y_true, axis=0)
+            return {variable: (rmse[i], rrmse[i], me[i]) for i, variable in enumerate(variables)}
+        
+        # DNN, GL and combined model metrics
+        metrics_dnn = calculate_metrics(y_true, y_pred_dnn)
+        metrics_gl = calculate_metrics(y_true, y_pred_gl)
+        metrics_combined = calculate_metrics(y_true, y_pred_combined)
 
         # Print the results
-        print("------------------------------------------------------------------------------------")
-        print("EVALUATION RESULTS :")
-        for variable in ['PAR', 'Temperature', 'Humidity', 'CO2', 'Leaf Temperature']:
+        # Collect the lines and log them as one message
+        results = ["------------------------------------------------------------------------------------", "EVALUATION RESULTS :"]
+        for variable in variables:
             rmse_dnn, rrmse_dnn, me_dnn = metrics_dnn[variable]
             rmse_gl, rrmse_gl, me_gl = metrics_gl[variable]
             rmse_combined, rrmse_combined, me_combined = metrics_combined[variable]
@@ -1249,9 +1497,11 @@ class MiniGreenhouse(gym.Env):
 
             unit_rrmse = "%"  # RRMSE is always in percentage for all variables
             
-            print(f"{variable} (DNN): RMSE = {rmse_dnn:.4f} {unit_rmse}, RRMSE = {rrmse_dnn:.4f} {unit_rrmse}, ME = {me_dnn:.4f} {unit_me}")
-            print(f"{variable} (GL): RMSE = {rmse_gl:.4f} {unit_rmse}, RRMSE = {rrmse_gl:.4f} {unit_rrmse}, ME = {me_gl:.4f} {unit_me}")
-            print(f"{variable} (Combined): RMSE = {rmse_combined:.4f} {unit_rmse}, RRMSE = {rrmse_combined:.4f} {unit_rrmse}, ME = {me_combined:.4f} {unit_me}")
+            results.append(f"{variable} (DNN): RMSE = {rmse_dnn:.4f} {unit_rmse}, RRMSE = {rrmse_dnn:.4f} {unit_rrmse}, ME = {me_dnn:.4f} {unit_me}")
+            results.append(f"{variable} (GL): RMSE = {rmse_gl:.4f} {unit_rmse}, RRMSE = {rrmse_gl:.4f} {unit_rrmse}, ME = {me_gl:.4f} {unit_me}")
+            results.append(f"{variable} (Combined): RMSE = {rmse_combined:.4f} {unit_rmse}, RRMSE = {rrmse_combined:.4f} {unit_rrmse}, ME = {me_combined:.4f} {unit_me}")
+        
+        logger.info("\n".join(results))
 
         return metrics_dnn, metrics_gl, metrics_combined
     
@@ -1272,13 +1522,15 @@ class MiniGreenhouse(gym.Env):
         Return: 
         np.array: predicted measurements inside mini-greenhouse
         '''
+        _import_tensorflow()
+        
         # Custom Layer to subtract from 1
-        class SubtractFromOne(Layer):
+        class SubtractFromOne(tf.keras.layers.Layer):
             def call(self, inputs):
                 return 1.0 - inputs
 
         # Custom Layer to extract a specific feature (replacing Lambda layers that slice inputs)
-        class ExtractFeature(Layer):
+        class ExtractFeature(tf.keras.layers.Layer):
             def __init__(self, index, **kwargs):
                 super(ExtractFeature, self).__init__(**kwargs)
                 self.index = index
@@ -1304,6 +1556,7 @@ class MiniGreenhouse(gym.Env):
         X_features_reshaped = X_features_values.reshape((X_features_values.shape[0], -1, X_features_values.shape[1]))
         
         # Load the LSTM model
+        # The json holds the compile config, model_from_json compiles the model with the custom r2_score_metric
         with open(f"trained-lstm-models/{target_variable.replace(' ', '_')}_lstm_model.json", "r") as json_file:
             loaded_model_json = json_file.read()
             loaded_model = tf.keras.models.model_from_json(
@@ -1316,11 +1569,9 @@ class MiniGreenhouse(gym.Env):
             )
         
         # Load the model weights
+        # No compile() again, the optimizer and metrics are not needed for the inference
         loaded_model.load_weights(f"trained-lstm-models/{target_variable.replace(' ', '_')}_lstm_model.weights.h5")
         
-        # Compile the loaded model
-        loaded_model.compile(optimizer='adam', loss='mse', metrics=['mae', self.r2_score_metric])
-        
         # Predict the measurements
         y_hat_measurements = loaded_model.predict(X_features_reshaped)
         
@@ -1423,8 +1674,7 @@ class MiniGreenhouse(gym.Env):
         # RUN WITH COMBINED MODELS!
         if self.flag_run_combined_models == True:            
             if self.action_from_drl == True and self.online_measurements == False:
-                print("---------------------------------------------------------------")
-                print("COMBINED MODELS | ACTION: DRL ON | OFFLINE")
+                logger.info("---------------------------------------------------------------\nCOMBINED MODELS | ACTION: DRL ON | OFFLINE")
                 
                 # Save all the data (included the actions) in an Excel file                
                 self.service_functions.export_to_excel(
@@ -1439,8 +1689,7 @@ class MiniGreenhouse(gym.Env):
                 self.service_functions.export_rewards_to_excel('output/rewards_list.xlsx', self.time_combined_models, self.rewards_list)
                                        
             else:
-                print("\n\n------------------------------------------------------------------------------------")
-                print("COMBINED MODELS | ACTION: SCHEDULED OR DRL | OFFLINE OR ONLINE")
+                logger.info("------------------------------------------------------------------------------------\nCOMBINED MODELS | ACTION: SCHEDULED OR DRL | OFFLINE OR ONLINE")
                 
                 # Evaluate predictions to get R² and MAE metrics
                 metrics_dnn, metrics_gl, metrics_combined = self.evaluate_predictions()
@@ -1465,8 +1714,7 @@ class MiniGreenhouse(gym.Env):
             
             # Run with dynamics control from the DRL action
             if self.action_from_drl == True and self.online_measurements == False:
-                print("---------------------------------------------------------------")
-                print("NOT COMBINED MODELS | ACTION: DRL | OFFLINE")
+                logger.info("---------------------------------------------------------------\nNOT COMBINED MODELS | ACTION: DRL | OFFLINE")
                 
                 # Save all the data (included the actions) in an Excel file
                 self.service_functions.export_to_excel(
@@ -1482,8 +1730,7 @@ class MiniGreenhouse(gym.Env):
                                             
             # Run with scheduled actions
             else:
-                print("-------------------------------------------------------------------")
-                print("NOT COMBINED MODELS | ACTION: SCHEDULED OR DRL | OFFLINE OR ONLINE")
+                logger.info("-------------------------------------------------------------------\nNOT COMBINED MODELS | ACTION: SCHEDULED OR DRL | OFFLINE OR ONLINE")
                 
                 # Save all the data in an Excel file                
                 self.service_functions.export_to_excel(
@@ -1499,4 +1746,12 @@ class MiniGreenhouse(gym.Env):
     
     # Ensure to properly close the MATLAB engine when the environment is no longer used
     def __del__(self):
-        self.eng.quit()
\ No newline at end of file
+        # The attributes are missing when the initialization failed before they were set
+        eng = getattr(self, 'eng', None)
+        if eng is not None:
+            eng.quit()
+        
+        # Wait for the plots that are still running
+        pool = getattr(self, '_plot_pool', None)
+        if pool is not None:
+            pool.shutdown(wait=True)
\ No newline at end of file
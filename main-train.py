@@ -84,8 +84,6 @@ print(
 )
     
 # Remove unnecessary files for the matlab files
-os.remove('controls.mat') # controls file
-os.remove('drl-env.mat')  # simulation file
-os.remove('indoor.mat')   # indoor measurements
-os.remove('fruit.mat')    # fruit growth
-#os.remove('outdoor.mat')  # outdoor measurements
+# The controls, indoor and fruit growth are passed to MATLAB as structs, only the simulation file is written
+if os.path.exists('drl-env.mat'):
+    os.remove('drl-env.mat')  # simulation file
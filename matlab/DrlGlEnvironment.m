@@ -23,13 +23,13 @@ function DrlGlEnvironment(seasonLength, firstDay, controlsFile, outdoorFile, ind
     % From IoT dataset
     [outdoor_iot, controls_iot, startTime] = loadMiniGreenhouseDrlData(firstDay, seasonLength, is_mature);
 
-    % Load DRL controls from the .mat file
-    controls = load(controlsFile);
+    % Load DRL controls, a struct passed by the Python engine or a .mat file
+    controls = loadStructOrFile(controlsFile);
     controls_drl = [controls.time, controls.ventilation, controls.toplights, controls.heater];
 
     % Ensure that the arrays are of the same length
     if size(controls_drl, 1) ~= size(controls_iot, 1)
-        error('The control arrays from the .mat file do not match the expected length.');
+        error('The DRL control arrays do not match the expected length.');
     end
     
     % Change controls for the controls_iot from the controls_drl
@@ -43,8 +43,8 @@ function DrlGlEnvironment(seasonLength, firstDay, controlsFile, outdoorFile, ind
         disp('OUTDOOR FILE IS EMPTY');
     else    
         disp('OUTDOOR FILE IS NOT EMPTY, LOAD FROM ONLINE MEASUREMENTS');
-        %Load outdoor measurements from the .mat file
-        outdoor_file = load(outdoorFile);
+        % Load outdoor measurements, a struct passed by the Python engine or a .mat file
+        outdoor_file = loadStructOrFile(outdoorFile);
         outdoor_drl = [outdoor_file.time, outdoor_file.par_out, outdoor_file.temp_out, outdoor_file.hum_out, outdoor_file.co2_out];
     
         % Function inputs:
@@ -78,8 +78,8 @@ function DrlGlEnvironment(seasonLength, firstDay, controlsFile, outdoorFile, ind
     if isempty(indoorFile)
         drl_indoor = [];
     else
-        % Load indoor measurements from the .mat file
-        indoor_file = load(indoorFile);
+        % Load indoor measurements, a struct passed by the Python engine or a .mat file
+        indoor_file = loadStructOrFile(indoorFile);
         drl_indoor = [indoor_file.time, indoor_file.temp_in, indoor_file.rh_in, indoor_file.co2_in];
         
         %   indoor          (optional) A 3 column matrix with:
@@ -168,8 +168,8 @@ function DrlGlEnvironment(seasonLength, firstDay, controlsFile, outdoorFile, ind
         end
 
     else 
-        % Load DRL controls from the .mat file
-        fruit_file = load(fruitFile);
+        % Load the fruit growth, a struct passed by the Python engine or a .mat file
+        fruit_file = loadStructOrFile(fruitFile);
 
         % Print the fruit growth data
         disp('Fruit growth: ');
@@ -221,7 +221,9 @@ function DrlGlEnvironment(seasonLength, firstDay, controlsFile, outdoorFile, ind
     leaf_temp = drl_env.x.tCan.val(:, 2);               % Crop temperature [°C]
         
     % Save the extracted data to a .mat file
-    save('drl-env.mat', 'time', 'temp_in', 'rh_in', 'co2_in', 'PAR_in', 'fruit_leaf', 'fruit_stem', 'fruit_dw', 'fruit_cbuf', 'fruit_tcansum', 'leaf_temp');
+    % v7.3 (HDF5) so the python side can read only the latest values
+    % No compression, the variables are small (one value per 5 minutes) and compressing them costs more than it saves
+    save('drl-env.mat', 'time', 'temp_in', 'rh_in', 'co2_in', 'PAR_in', 'fruit_leaf', 'fruit_stem', 'fruit_dw', 'fruit_cbuf', 'fruit_tcansum', 'leaf_temp', '-v7.3', '-nocompression');
     
     %% Print the values in tabular format
     fprintf('Time (s)\tIndoor Temp (°C)\tIndoor Humidity (%%)\tIndoor CO2 (ppm)\tPAR Inside (W/m²)\tFruit Dry Weight (g/m²)\tFruit Dry Weight (g/m²)\tFruit Carbohydrates Buffer [mg{CH2O} m^{-2} s^{-1}]\tCrop Development Stage [°C day s^{-1}]\tCrop Temperature [°C]\n');
@@ -231,3 +233,9 @@ function DrlGlEnvironment(seasonLength, firstDay, controlsFile, outdoorFile, ind
 
     %% Clear the workspace
     % clear;
+
+function data = loadStructOrFile(data)
+    % Load the struct from a .mat file, the Python engine passes the struct directly
+    if ischar(data) || isstring(data)
+        data = load(data);
+    end
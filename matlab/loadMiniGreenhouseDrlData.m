@@ -68,6 +68,7 @@ function [outdoor, controls, startTime] = loadMiniGreenhouseDrlData(firstDay, se
    
     
     %% load file
+    % The datasets are loaded from disk once and kept in the persistent MATLAB engine, see loadCachedMat
     if is_mature == 1
         currentFile = mfilename('fullpath');
         currentFolder = fileparts(currentFile);
@@ -76,7 +77,7 @@ function [outdoor, controls, startTime] = loadMiniGreenhouseDrlData(firstDay, se
         % path = [currentFolder '\septemberiotdatasetstestmaturecrops.mat'];
         % 
         % % load hi res 
-        % minigreenhouse = load(path).septemberiotdatasetstestmaturecrops;
+        % minigreenhouse = loadCachedMat(path).septemberiotdatasetstestmaturecrops;
         % 
         % disp('MATLAB LOAD DATA from septemberiotdatasetstestmaturecrops.mat');
 
@@ -84,7 +85,7 @@ function [outdoor, controls, startTime] = loadMiniGreenhouseDrlData(firstDay, se
         path = [currentFolder '\octoberiotdatasetstestmaturecrops.mat'];  
         
         % load hi res 
-        minigreenhouse = load(path).octoberiotdatasetstestmaturecrops;
+        minigreenhouse = loadCachedMat(path).octoberiotdatasetstestmaturecrops;
 
         disp('MATLAB LOAD DATA from octoberiotdatasetstestmaturecrops.mat');
     else
@@ -95,7 +96,7 @@ function [outdoor, controls, startTime] = loadMiniGreenhouseDrlData(firstDay, se
         % path = [currentFolder '\juneiotdatasetstestsmallcrops.mat'];
         % 
         % % load hi res 
-        % minigreenhouse = load(path).juneiotdatasetstestsmallcrops;
+        % minigreenhouse = loadCachedMat(path).juneiotdatasetstestsmallcrops;
         % 
         % disp('MATLAB LOAD DATA from juneiotdatasetstestsmallcrops.mat')
 
@@ -103,7 +104,7 @@ function [outdoor, controls, startTime] = loadMiniGreenhouseDrlData(firstDay, se
         path = [currentFolder '\augustiotdatasetstestsmallcrops.mat'];
 
         % load hi res 
-        minigreenhouse = load(path).augustiotdatasetstestsmallcrops;
+        minigreenhouse = loadCachedMat(path).augustiotdatasetstestsmallcrops;
 
         disp('MATLAB LOAD DATA from augustiotdatasetstestsmallcrops.mat')
 
@@ -111,7 +112,7 @@ function [outdoor, controls, startTime] = loadMiniGreenhouseDrlData(firstDay, se
         % path = [currentFolder '\iotdatasetstraindrl.mat'];
         % 
         % %load hi res 
-        % minigreenhouse = load(path).iotdatasetstraindrl;
+        % minigreenhouse = loadCachedMat(path).iotdatasetstraindrl;
         % 
         % disp('MATLAB LOAD DATA from iotdatasetstraindrl.mat')
 
@@ -213,4 +214,20 @@ function [outdoor, controls, startTime] = loadMiniGreenhouseDrlData(firstDay, se
     controls(:,9) = 0;
     controls(:,10) = inputData(:,12);   %zeros(size(controls(:,1))); HEATER
 
-end
\ No newline at end of file
+end
+
+function data = loadCachedMat(path)
+    % Load the .mat file once per path and modification date, the DRL environment calls this function every step
+    % A changed file is loaded again
+    persistent cachedPath cachedDate cachedData
+    
+    fileInfo = dir(path);
+    
+    if ~isequal(cachedPath, path) || ~isequal(cachedDate, fileInfo.datenum)
+        cachedData = load(path);
+        cachedPath = path;
+        cachedDate = fileInfo.datenum;
+    end
+    
+    data = cachedData;
+end
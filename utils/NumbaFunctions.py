@@ -0,0 +1,61 @@
+'''
+Numba kernels for the numeric code of the mini-greenhouse environment that runs every step
+
+Author: Efraim Manurung
+MSc Thesis in Information Technology Group, Wageningen University
+
+efraim.manurung@gmail.com
+'''
+
+# Import libraries
+import numpy as np
+
+# Numba is optional, without it the numeric kernels run as plain Python functions
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+# Constants of the conversions, the same as in ServiceFunctions (based on the GreenLight model)
+R = 8.3144598       # molar gas constant [J mol^{-1} K^{-1}]
+C2K = 273.15        # conversion from Celsius to Kelvin [K]
+M_CO2 = 44.01e-3    # molar mass of CO2 [kg mol^-{1}]
+P = 101325          # pressure (assumed to be 1 atm) [Pa]
+
+@njit(cache=True, fastmath=True)
+def convert_indoor_state(gl_tail, time, co2_ppm, temp, rh):
+    '''
+    Build the indoor state for the GreenLight model from the latest predictions in one pass.
+
+    The same results as co2ppm_to_dens, and rh_to_vapor_density followed by vapor_density_to_pressure
+    of ServiceFunctions, without their intermediate arrays.
+    The vapor pressure is the relative humidity times the saturation vapor pressure.
+
+    Inputs:
+        gl_tail     latest rows of the GL predictions (numeric matrix), the first row is skipped
+        time        column of the time [s]
+        co2_ppm     column of the CO2 concetration in air [ppm]
+        temp        column of the temperatures [°C]
+        rh          column of the relative humidity [%] between 0 and 100
+    Outputs:
+        state       matrix with the columns time [s], temperature [°C], vapor pressure [Pa] 
+                    and CO2 concentration in air [mg m^{-3}], one row less than gl_tail
+    '''
+    state = np.empty((gl_tail.shape[0] - 1, 4))
+
+    for i in range(1, gl_tail.shape[0]):
+        temp_in = gl_tail[i, temp]
+
+        state[i - 1, 0] = gl_tail[i, time]
+        state[i - 1, 1] = temp_in
+
+        # Saturation vapor pressure of air in given temperature [Pa] times the relative humidity [0-1]
+        state[i - 1, 2] = gl_tail[i, rh] / 100.0 * 610.78 * np.exp(17.2694 * temp_in / (temp_in + 238.3))
+
+        # co2Dens = P*10^-6*ppm*M_CO2./(R*(temp+C2K)), in [mg m^{-3}]
+        state[i - 1, 3] = P * 1e-6 * gl_tail[i, co2_ppm] * M_CO2 / (R * (temp_in + C2K)) * 1e6
+
+    return state
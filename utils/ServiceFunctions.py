@@ -11,17 +11,24 @@ efraim.manurung@gmail.com
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
-import scipy.io as sio
 
 import json
+import zlib
 import paho.mqtt.client as mqtt
 
+# orjson is optional, it serializes the numpy arrays of the MQTT payloads directly
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class ServiceFunctions:
     def __init__(self):
         print("Service Functions initiated!")
         
         # Initiate the MQTT client for publishing data
         self.client_pub = mqtt.Client()
+        self.pub_connected = False # The publishing client connects once and keeps its network loop running
         
         # Initialize the MQTT client for subscribing data
         self.client_sub = mqtt.Client(client_id="", protocol=mqtt.MQTTv5)
@@ -139,7 +146,8 @@ class ServiceFunctions:
         
         return vaporPres
     
-    def plot_all_data(self, filename, time, co2_actual, temp_actual, rh_actual, par_actual, 
+    @staticmethod
+    def plot_all_data(filename, time, co2_actual, temp_actual, rh_actual, par_actual, 
                     co2_predicted_dnn, temp_predicted_dnn, rh_predicted_dnn, par_predicted_dnn, 
                     co2_predicted_gl, temp_predicted_gl, rh_predicted_gl, par_predicted_gl, 
                     co2_combined=None, temp_combined=None, rh_combined=None, par_combined=None, 
@@ -239,8 +247,12 @@ class ServiceFunctions:
         
         # Save the plot to a file
         fig.savefig(filename, dpi=500)
+        
+        # Release the figure, the plots can run in a long-lived background process
+        plt.close(fig)
     
-    def plot_leaf_temperature(self, filename, time, leaf_temp_actual, leaf_temp_predicted_dnn, leaf_temp_predicted_gl, leaf_temp_combined=None,
+    @staticmethod
+    def plot_leaf_temperature(filename, time, leaf_temp_actual, leaf_temp_predicted_dnn, leaf_temp_predicted_gl, leaf_temp_combined=None,
                             metrics_dnn=None, metrics_gl=None, metrics_combined=None):
         '''
         Plot leaf_temperature parameter to make it easier to compare predicted vs actual values.
@@ -299,6 +311,9 @@ class ServiceFunctions:
 
         # Save the plot to a file
         fig.savefig(filename, dpi=500)
+        
+        # Release the figure, the plots can run in a long-lived background process
+        plt.close(fig)
 
     def export_to_excel(self, filename, time, ventilation_list, toplights_list, heater_list, reward_list,
                         co2_actual=None, temp_actual=None, rh_actual=None, par_actual=None, leaf_temp_actual=None,
@@ -405,7 +420,8 @@ class ServiceFunctions:
         df.to_excel(filename, index=False)
         print(f"Data successfully exported to {filename}")
 
-    def plot_actions(self, filename, time, ventilation_list, toplights_list, heater_list):
+    @staticmethod
+    def plot_actions(filename, time, ventilation_list, toplights_list, heater_list):
         '''
         Plot the actions.
 
@@ -445,8 +461,12 @@ class ServiceFunctions:
 
         # Save the plot to a file
         fig.savefig(filename, dpi=500)
+        
+        # Release the figure, the plots can run in a long-lived background process
+        plt.close(fig)
     
-    def plot_rewards(self, filename, time, rewards_list):
+    @staticmethod
+    def plot_rewards(filename, time, rewards_list):
         '''
         Plot the rewards and cumulative rewards.
 
@@ -486,6 +506,9 @@ class ServiceFunctions:
 
         # Save the plot to a file
         fig.savefig(filename, dpi=500)
+        
+        # Release the figure, the plots can run in a long-lived background process
+        plt.close(fig)
     
     def export_rewards_to_excel(self, filename, time, rewards_list):
         '''
@@ -576,6 +599,18 @@ class ServiceFunctions:
         - heater: List of heater control values
         '''
         
+        if orjson is not None:
+            # orjson only serializes C-contiguous arrays, the actions from the DRL model are broadcast views
+            data = {
+                "time": np.ascontiguousarray(time),
+                "ventilation": np.ascontiguousarray(ventilation),
+                "toplights": np.ascontiguousarray(toplights),
+                "heater": np.ascontiguousarray(heater)
+            }
+            
+            # Compact output like the json fallback below, without the .tolist() copies
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+        
         def convert_to_native(value):
             if isinstance(value, np.ndarray):
                 return value.tolist()
@@ -591,29 +626,48 @@ class ServiceFunctions:
             "heater": [convert_to_native(v) for v in heater]
         }
 
-        json_data = json.dumps(data, indent=4)
+        # Compact separators, the payload is sent every step
+        json_data = json.dumps(data, separators=(',', ':'))
         
         return json_data
     
-    def publish_mqtt_data(self, json_data, broker="192.168.1.56", port=1883, topic="greenhouse-iot-system/drl-controls"):
+    def publish_mqtt_data(self, json_data, broker="192.168.1.56", port=1883, topic="greenhouse-iot-system/drl-controls", compress=False):
         '''
         Publish JSON data to an MQTT broker.
         
+        The client connects on the first call and keeps the connection and its network loop, 
+        the next calls only publish the data (QoS 1, the broker confirms it asynchronously).
+        
+        With compress, payloads longer than 16 bytes are compressed with zlib and published to the topic 
+        with the suffix /z, the subscriber inflates them. The IoT system has to subscribe to that topic.
+        
         Parameters:
         - json_data: JSON formatted data to publish
         - broker: MQTT broker address
         - port: MQTT broker port
         - topic: MQTT topic to publish data to
+        - compress: Compress the payload with zlib (default is False)
         '''
         
         def on_connect(client, userdata, flags, rc):
             print("Connected with result code PUBLISH MQTT " + str(rc))
-            client.publish(topic, str(json_data))
         
-        self.client_pub.on_connect = on_connect
+        if self.pub_connected == False:
+            self.client_pub.on_connect = on_connect
+            
+            self.client_pub.connect(broker, port, 60)
+            self.client_pub.loop_start()
+            self.pub_connected = True
+        
+        payload = str(json_data)
+        
+        if compress == True and len(payload) > 16:
+            # Fastest compression level, the payload is small and sent every step
+            self.client_pub.publish(topic + "/z", zlib.compress(payload.encode(), 1), qos=1)
+            return
         
-        self.client_pub.connect(broker, port, 60)
-        self.client_pub.loop_start()
+        # Messages with QoS 1 are queued by the client until the connection is acknowledged
+        self.client_pub.publish(topic, payload, qos=1)
 
     def get_outdoor_indoor_measurements(self, broker="192.168.1.56", port=1883, topic="greenhouse-iot-system/outdoor-indoor-measurements"):
         '''
@@ -734,8 +788,5 @@ class ServiceFunctions:
             'co2_in': np.array(co2_in).reshape(-1, 1),
             'leaf_temp': np.array(leaf_temp).reshape(-1, 1)
         }
-
-        # Save measurements to a .mat file
-        sio.savemat('outdoor-indoor.mat', outdoor_indoor_measurements)
         
         return outdoor_indoor_measurements
\ No newline at end of file